@@ -0,0 +1,123 @@
+"""
+Служебные команды.
+
+Запуск:
+    python -m app.cli rebuild-review-stats   # пересчет сводки по отзывам
+    python -m app.cli collect-images         # удаление неиспользуемых файлов из хранилища
+    python -m app.cli seed-demo              # демонстрационные данные (admin/admin, 10 товаров)
+    python -m app.cli seed --products 1000000 --reviews 200000 --users 10000 --seed 42
+
+Схема БД создается и обновляется миграциями: alembic upgrade head
+"""
+import argparse
+import time
+from app.core.database import SessionLocal, engine
+from app.core.init_data import create_test_data
+from app.core.seeding import DEFAULT_BATCH_SIZE, SYNTHETIC_PASSWORD, generate_catalog
+from app.core.versioning import ensure_versions
+from app.crud.product import collect_orphaned_images
+from app.crud.review import ensure_review_stats, rebuild_review_stats
+
+
+def _rebuild_review_stats(args):
+    db = SessionLocal()
+    try:
+        stats = rebuild_review_stats(db)
+    finally:
+        db.close()
+    print(f"Отзывов: {stats.count}, средняя оценка: {stats.average}, распределение: {stats.histogram}")
+
+
+def _collect_images(args):
+    db = SessionLocal()
+    try:
+        removed = collect_orphaned_images(db, grace_seconds=args.grace_seconds)
+    finally:
+        db.close()
+    print(f"Удалено неиспользуемых файлов: {removed}")
+
+
+def _seed_demo(args):
+    db = SessionLocal()
+    try:
+        ensure_versions(db)
+        create_test_data(db)
+        ensure_review_stats(db)
+    finally:
+        db.close()
+
+
+def _seed(args):
+    started = time.perf_counter()
+
+    current = [None]
+
+    def progress(table, inserted):
+        if current[0] not in (None, table):
+            print()
+        current[0] = table
+        print(f"\r{table}: {inserted}", end="", flush=True)
+
+    try:
+        counts = generate_catalog(
+            engine,
+            product_types=args.product_types,
+            products=args.products,
+            users=args.users,
+            reviews=args.reviews,
+            seed=args.seed,
+            batch_size=args.batch_size,
+            with_images=not args.no_images,
+            progress=progress,
+        )
+    except ValueError as exc:
+        raise SystemExit(f"Ошибка: {exc}")
+    print()
+    print("Добавлено: " + ", ".join(f"{table} - {count}" for table, count in counts.items()))
+    print(f"Готово за {time.perf_counter() - started:.1f} с; пароль пользователей: {SYNTHETIC_PASSWORD}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser(
+        "rebuild-review-stats", help="recompute the review summary row from the reviews table"
+    )
+    rebuild.set_defaults(handler=_rebuild_review_stats)
+
+    collect = commands.add_parser(
+        "collect-images", help="delete blobs that are not referenced by any product"
+    )
+    collect.add_argument(
+        "--grace-seconds",
+        type=float,
+        default=None,
+        help="keep unreferenced blobs saved within this many seconds "
+        "(default: ORPHAN_IMAGE_GRACE_SECONDS)",
+    )
+    collect.set_defaults(handler=_collect_images)
+
+    seed_demo = commands.add_parser(
+        "seed-demo", help="create the demo admin, product types, products and reviews if missing"
+    )
+    seed_demo.set_defaults(handler=_seed_demo)
+
+    seed = commands.add_parser("seed", help="bulk-load a synthetic catalog for load testing")
+    seed.add_argument("--product-types", type=int, default=20)
+    seed.add_argument("--products", type=int, default=100_000)
+    seed.add_argument("--users", type=int, default=1_000)
+    seed.add_argument("--reviews", type=int, default=10_000)
+    seed.add_argument("--seed", type=int, default=0, help="random seed (same seed - same data)")
+    seed.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    seed.add_argument(
+        "--no-images", action="store_true", help="do not attach demo images to products"
+    )
+    seed.set_defaults(handler=_seed)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
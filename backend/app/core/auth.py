@@ -1,19 +1,34 @@
+import hashlib
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import get_db, run_db
 from app.core.security import decode_access_token
-from app.crud.user import get_user_by_login
-from app.models.user import User
+from app.crud.user import load_user_principal, user_principal_cache
+from app.schemas.user import UserResponse
 
 security = HTTPBearer()
 
+_MISSING = object()
+
+# Логин из уже проверенного токена. Ключ - sha256 токена, чтобы не держать
+# в памяти сами токены; запись живет не дольше, чем действует токен
+token_cache = TTLCache(
+    "auth_tokens",
+    settings.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+    settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+
+def _token_login(token: str) -> str:
+    digest = hashlib.sha256(token.encode()).digest()
+    login = token_cache.get(digest)
+    if login is not None:
+        return login
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    token = credentials.credentials
     payload = decode_access_token(token)
 
     if payload is None:
@@ -29,10 +44,33 @@ def get_current_user(
             detail="Invalid authentication credentials",
         )
 
-    user = get_user_by_login(db, login=login)
+    exp = payload.get("exp")
+    token_cache.set(digest, login, ttl=exp - time.time() if exp is not None else None)
+    return login
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+) -> UserResponse:
+    login = _token_login(credentials.credentials)
+
+    user = user_principal_cache.get(login, _MISSING)
+    if user is _MISSING:
+        user = await run_db(db, load_user_principal, login=login)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
         )
 
     return user
+
+
+async def get_current_superuser(
+    current_user: UserResponse = Depends(get_current_user),
+) -> UserResponse:
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
+        )
+    return current_user
@@ -0,0 +1,131 @@
+"""
+Ограниченный in-process кеш (LRU + TTL) для редко меняющихся данных.
+
+Кеш локален для процесса: в каждом воркере uvicorn свой экземпляр. Записи
+сбрасываются функциями записи из app.crud, а TTL ограничивает время,
+в течение которого другие воркеры могут отдавать устаревшие данные.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+_MISSING = object()
+
+_registry: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Увеличивается при каждой инвалидации: значение, прочитанное из БД
+        # до инвалидации, не попадет в кеш после нее
+        self._generation = 0
+        _registry[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        generation: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """ttl переопределяет время жизни записи, но не больше общего TTL кеша."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        return self.load(key, loader)
+
+    def load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Загружает значение в обход кеша и сохраняет его (после промаха get)."""
+        generation = self._generation
+        value = loader()
+        self.set(key, value, generation=generation)
+        return value
+
+    def get_many_or_load(
+        self, keys: Iterable[Hashable], loader: Callable[[List[Hashable]], Dict[Hashable, Any]]
+    ) -> Dict[Hashable, Any]:
+        """
+        Значения по списку ключей. Все промахи загружаются одним вызовом
+        loader(missing), который возвращает словарь ключ -> значение.
+        """
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            generation = self._generation
+            loaded = loader(missing)
+            for key, value in loaded.items():
+                self.set(key, value, generation=generation)
+            found.update(loaded)
+        return found
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _registry.items()}
+
+
+def clear_caches() -> None:
+    """Сбрасывает все кеши процесса (тесты, измерение запросов на холодном кеше)."""
+    for cache in _registry.values():
+        cache.clear()
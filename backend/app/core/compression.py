@@ -0,0 +1,177 @@
+"""
+Сжатие ответов (gzip, brotli).
+
+Сжимаются только тела не меньше COMPRESSION_MINIMUM_SIZE с текстовыми типами
+содержимого (JSON, текст); изображения и потоковые ответы передаются как есть.
+Ответы с ETag (каталог, /reviews/latest) определяются версией данных, поэтому
+их сжатые тела хранятся в кеше по ETag и кодировке и при повторном запросе
+не сжимаются заново. В ключ входит и дайджест несжатого тела (blake2b в разы
+дешевле сжатия): из кеша отдается только сжатая форма именно того тела, которое
+построил эндпоинт, даже если тело и ETag когда-либо разойдутся.
+ETag сжатого ответа становится слабым (W/"...") - представление отличается
+от несжатого, а If-None-Match сравнивается без учета W/.
+"""
+import gzip
+import hashlib
+from typing import Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli необязателен
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+# Тела больше этого размера сжимаются в пуле потоков, чтобы не блокировать цикл событий
+_THREADPOOL_MIN_SIZE = 256 * 1024
+
+compressed_cache = TTLCache(
+    "compressed_bodies",
+    settings.COMPRESSION_CACHE_MAX_ENTRIES,
+    settings.COMPRESSION_CACHE_TTL_SECONDS,
+)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """br или gzip по заголовку Accept-Encoding (с учетом q=0), иначе None."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for coding in ("br", "gzip") if brotli is not None else ("gzip",):
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def _is_compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "")
+    return "content-encoding" not in headers and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _add_vary(headers: MutableHeaders) -> None:
+    vary = headers.get("vary")
+    if not vary:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+class CompressionMiddleware:
+    """ASGI middleware: сжимает ответ целиком, если клиент это поддерживает."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, _vary_only(send))
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if _is_compressible(headers):
+                    _add_vary(headers)
+                    # Решение откладывается до первого фрагмента тела
+                    start_message = message
+                    return
+                passthrough = True
+                await send(message)
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < settings.COMPRESSION_MINIMUM_SIZE:
+                # Потоковые и маленькие ответы отдаются без сжатия
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start_message)
+            compressed, etag = await self._compress(body, encoding, headers.get("etag"))
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            if etag:
+                headers["ETag"] = etag
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    async def _compress(
+        body: bytes, encoding: str, etag: Optional[str]
+    ) -> Tuple[bytes, Optional[str]]:
+        key = None
+        if etag:
+            key = (etag, encoding, hashlib.blake2b(body, digest_size=16).digest())
+        if key is not None:
+            cached = compressed_cache.get(key)
+            if cached is not None:
+                return cached, _weak(etag)
+        if len(body) >= _THREADPOOL_MIN_SIZE:
+            compressed = await run_in_threadpool(compress, body, encoding)
+        else:
+            compressed = compress(body, encoding)
+        if key is not None:
+            compressed_cache.set(key, compressed)
+        return compressed, _weak(etag) if etag else None
+
+
+def _vary_only(send):
+    """
+    Ответ без сжатия (клиент не принимает поддерживаемых кодировок). Тело, которое
+    могло бы быть сжато, все равно помечается Vary: Accept-Encoding, иначе общий
+    кеш отдаст несжатое представление клиентам с gzip (или наоборот).
+    """
+
+    async def send_wrapper(message):
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            if _is_compressible(headers):
+                _add_vary(headers)
+        await send(message)
+
+    return send_wrapper
+
+
+def _weak(etag: str) -> str:
+    return etag if etag.startswith("W/") else f"W/{etag}"
@@ -1,11 +1,78 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "postgresql://postgres:postgres@db:5432/app_db"
+    # Асинхронный стек БД (asyncpg/aiosqlite) для эндпоинтов
+    DATABASE_ASYNC: bool = False
+    # По умолчанию выводится из DATABASE_URL заменой драйвера
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Пул соединений (на каждый воркер и отдельно для синхронного и асинхронного движков)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Сколько секунд ждать свободного соединения, прежде чем вернуть ошибку
+    DB_POOL_TIMEOUT: float = 30
+    # Соединения старше этого возраста (секунды) переоткрываются; -1 - без ограничения
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Ограничение времени выполнения одного запроса в PostgreSQL (0 - без ограничения)
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # Бюджет SQL на один HTTP-запрос: превышение пишется в лог app.queries (0 - не проверять)
+    QUERY_BUDGET_COUNT: int = 20
+    QUERY_BUDGET_SECONDS: float = 0.5
+    # Отдельные запросы дольше этого порога пишутся в лог (0 - не писать)
+    SLOW_QUERY_SECONDS: float = 0.2
+    # Заголовки X-Query-Count и Server-Timing в ответах (для разработки)
+    QUERY_STATS_HEADERS: bool = False
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+
+    # Стоимость bcrypt (log2 числа раундов)
+    BCRYPT_ROUNDS: int = 12
+    # Пул для bcrypt: "thread" или "process"
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    # Одновременно выполняемые хеширования и число ожидающих в очереди сверх них
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32
+
+    BLOB_STORE_BACKEND: str = "local"
+    MEDIA_ROOT: str = "media"
+    # Число процессов для генерации уменьшенных копий изображений (0 - в текущем потоке)
+    IMAGE_RENDITION_WORKERS: int = 2
+    # Сколько помнить изображения, которые Pillow не смог прочитать (не ставить их в очередь)
+    IMAGE_RENDITION_FAILURE_TTL_SECONDS: float = 3600
+    IMAGE_RENDITION_FAILURE_MAX_ENTRIES: int = 4096
+    MAX_IMAGE_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    # collect-images не удаляет неиспользуемые файлы, сохраненные позже этого срока:
+    # товар, ссылающийся на такой файл, может быть еще не записан
+    ORPHAN_IMAGE_GRACE_SECONDS: int = 3600
+    # Загружаемый файл держится в памяти до этого размера, дальше пишется на диск
+    UPLOAD_SPOOL_MAX_BYTES: int = 1024 * 1024
+
+    # Максимальное число элементов в одном запросе массовой записи
+    BULK_MAX_ITEMS: int = 10000
+
+    CATALOG_CACHE_TTL_SECONDS: float = 60
+    CATALOG_CACHE_MAX_ENTRIES: int = 1024
+    # Буфер последних отзывов: новые отзывы этого воркера попадают в него сразу,
+    # отзывы из других воркеров - не позже чем через TTL
+    LATEST_REVIEWS_TTL_SECONDS: float = 30
+
+    # Кеш проверенных токенов (запись живет до exp токена) и пользователей по логину
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 4096
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 1024
+
+    # Сжатие ответов: gzip, brotli - если установлен пакет Brotli и его принимает клиент
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    # Сжатые тела ответов с ETag переиспользуются, пока не изменится версия данных
+    COMPRESSION_CACHE_MAX_ENTRIES: int = 256
+    COMPRESSION_CACHE_TTL_SECONDS: float = 60
 
     class Config:
         env_file = ".env"
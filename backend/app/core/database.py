@@ -1,17 +1,97 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.pool import TimedAsyncAdaptedQueuePool, TimedQueuePool
 
-engine = create_engine(settings.DATABASE_URL)
+
+def _engine_options(url: str, poolclass) -> dict:
+    options = {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    timeout_ms = settings.DB_STATEMENT_TIMEOUT_MS
+    driver = make_url(url).drivername
+    # statement_timeout задается при открытии соединения и действует на все запросы сессии
+    if timeout_ms and driver == "postgresql+asyncpg":
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout_ms)}}
+    elif timeout_ms and driver.startswith("postgresql"):
+        options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    return options
+
+
+engine = create_engine(
+    settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL, TimedQueuePool)
+)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = make_url(settings.DATABASE_URL)
+    return url.set(drivername=_ASYNC_DRIVERS[url.get_backend_name()]).render_as_string(
+        hide_password=False
+    )
+
+
+async_engine = None
+AsyncSessionLocal = None
+if settings.DATABASE_ASYNC:
+    async_database_url = _async_database_url()
+    async_engine = create_async_engine(
+        async_database_url,
+        **_engine_options(async_database_url, TimedAsyncAdaptedQueuePool),
+    )
+    instrument_engine(async_engine.sync_engine)
+    # После commit объекты не сбрасываются: ленивая догрузка атрибутов
+    # вне run_sync в асинхронном режиме невозможна
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
 
-def get_db():
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+get_db = get_async_db if settings.DATABASE_ASYNC else get_sync_db
+
+
+async def run_db(db, fn, *args, **kwargs):
+    """
+    Выполняет функцию из app.crud с сессией из get_db, не блокируя цикл событий.
+
+    Для AsyncSession функция выполняется через run_sync: код app.crud остается
+    общим, а ввод-вывод идет через асинхронный драйвер (asyncpg, aiosqlite).
+    Для синхронной Session функция выполняется в пуле потоков, как это делал
+    Starlette для синхронных эндпоинтов.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
@@ -0,0 +1,78 @@
+"""
+Разреженные наборы полей: ?fields=id,name,price.
+
+Запрошенные поля ответа отображаются в столбцы модели, которые загружаются через
+load_only; остальные столбцы не читаются из БД. Частичные объекты ответа
+создаются через model_construct (без валидации отсутствующих полей)
+и сериализуются только в запрошенные поля.
+"""
+from typing import Iterable, Mapping, Optional, Sequence, Tuple, Type
+from fastapi import HTTPException, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import load_only
+
+Fields = Tuple[str, ...]
+
+
+def selectable_fields(schema: Type[BaseModel]) -> Fields:
+    """Поля ответа, которые можно запросить: без исключенных из сериализации."""
+    return tuple(
+        name for name, field in schema.model_fields.items() if not field.exclude
+    ) + tuple(schema.__pydantic_decorators__.computed_fields)
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[Fields]:
+    """
+    Разбирает параметр fields. None - все поля; неизвестное поле - ошибка 400.
+    Результат упорядочен и годится как часть ключа кеша.
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested:
+        raise HTTPException(status_code=400, detail="fields must not be empty")
+    unknown = requested - set(selectable_fields(schema))
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return tuple(sorted(requested))
+
+
+def column_names(
+    fields: Fields,
+    always: Iterable[str] = ("id",),
+    derived: Optional[Mapping[str, Sequence[str]]] = None,
+) -> Fields:
+    """
+    Столбцы, нужные для полей ответа. always - столбцы, без которых не обойтись
+    (ключ, ключ сортировки для курсора); derived - столбцы вычисляемых полей.
+    """
+    derived = derived or {}
+    names = set(always)
+    for name in fields:
+        names.update(derived.get(name, (name,)))
+    return tuple(sorted(names))
+
+
+def load_columns(model, columns: Fields):
+    return load_only(*(getattr(model, name) for name in columns))
+
+
+def project(schema: Type[BaseModel], obj, columns: Fields) -> BaseModel:
+    """Частичный объект ответа из загруженных столбцов."""
+    return schema.model_construct(**{name: getattr(obj, name) for name in columns})
+
+
+def fields_response(content, fields: Fields, response: Response) -> ORJSONResponse:
+    """
+    Ответ только с запрошенными полями (объект или список). Заголовки, уже
+    проставленные эндпоинтом (ETag, X-Next-Cursor), переносятся в ответ.
+    """
+    include = set(fields)
+    if isinstance(content, list):
+        body = [item.model_dump(mode="json", include=include) for item in content]
+    else:
+        body = content.model_dump(mode="json", include=include)
+    return ORJSONResponse(content=body, headers=dict(response.headers))
@@ -0,0 +1,28 @@
+from typing import Optional
+
+# URL изображения содержит хеш содержимого, поэтому при совпадении версии
+# ответ можно кешировать бессрочно; без версии клиент обязан перепроверять ETag
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+IMAGE_REVALIDATE_CACHE_CONTROL = "no-cache"
+
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def image_version(image_hash: str) -> str:
+    """Короткая версия изображения для URL (префикс sha256)."""
+    return image_hash[:16]
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Определяет MIME-тип изображения по сигнатуре первых байтов."""
+    for signature, media_type in _SIGNATURES:
+        if head.startswith(signature):
+            return media_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
@@ -5,11 +5,14 @@ from app.models.product_type import ProductType
 from app.models.product import Product
 from app.models.review import Review
 from app.core.security import get_password_hash
+from app.core.storage import get_blob_store
+from app.core.versioning import bump_version
+from app.crud.review import rebuild_review_stats
 
 
 def create_test_data(db: Session):
     """
-    Создает тестовые данные при первом запуске приложения.
+    Создает демонстрационные данные (команда python -m app.cli seed-demo).
     Проверяет наличие записей в таблицах и добавляет их, если таблицы пустые.
     """
 
@@ -23,6 +26,7 @@ def create_test_data(db: Session):
             is_superuser=True
         )
         db.add(admin_user)
+        bump_version(db, "users")
         db.commit()
         print("Администратор создан: login=admin, password=admin")
 
@@ -38,6 +42,7 @@ def create_test_data(db: Session):
         db.add(ring_type)
         db.add(earring_type)
         db.add(brooch_type)
+        bump_version(db, "product_types")
         db.commit()
         db.refresh(ring_type)
         db.refresh(earring_type)
@@ -57,12 +62,14 @@ def create_test_data(db: Session):
         # Путь к папке с изображениями
         images_dir = os.path.join(os.path.dirname(__file__), "..", "static", "images")
 
-        # Функция для чтения изображения
+        store = get_blob_store()
+
+        # Функция для загрузки изображения в хранилище, возвращает его хеш
         def read_image(filename):
             path = os.path.join(images_dir, filename)
             if os.path.exists(path):
                 with open(path, 'rb') as f:
-                    return f.read()
+                    return store.put(f.read())
             return None
 
         # Кольца
@@ -139,40 +146,41 @@ def create_test_data(db: Session):
 
         # Добавляем кольца
         for ring_data in rings:
-            image_data = read_image(ring_data["image"])
+            image_hash = read_image(ring_data["image"])
             product = Product(
                 product_type_id=ring_type.id,
                 name=ring_data["name"],
                 description=ring_data["description"],
                 price=ring_data["price"],
-                image=image_data
+                image_hash=image_hash
             )
             db.add(product)
 
         # Добавляем серьги
         for earring_data in earrings:
-            image_data = read_image(earring_data["image"])
+            image_hash = read_image(earring_data["image"])
             product = Product(
                 product_type_id=earring_type.id,
                 name=earring_data["name"],
                 description=earring_data["description"],
                 price=earring_data["price"],
-                image=image_data
+                image_hash=image_hash
             )
             db.add(product)
 
         # Добавляем броши
         for brooch_data in brooches:
-            image_data = read_image(brooch_data["image"])
+            image_hash = read_image(brooch_data["image"])
             product = Product(
                 product_type_id=brooch_type.id,
                 name=brooch_data["name"],
                 description=brooch_data["description"],
                 price=brooch_data["price"],
-                image=image_data
+                image_hash=image_hash
             )
             db.add(product)
 
+        bump_version(db, "products")
         db.commit()
         print(f"Создано {len(rings) + len(earrings) + len(brooches)} товаров")
 
@@ -216,7 +224,9 @@ def create_test_data(db: Session):
                 )
                 db.add(review)
 
+            bump_version(db, "reviews")
             db.commit()
+            rebuild_review_stats(db)
             print(f"Создано {len(test_reviews)} тестовых отзывов")
 
     print("Инициализация тестовых данных завершена!")
@@ -0,0 +1,234 @@
+"""
+Метрики в формате Prometheus.
+
+MetricsMiddleware считает запросы и их длительность по шаблону маршрута
+(/products/{product_id}, а не /products/42 - число рядов не растет с числом id).
+Обработчики событий SQLAlchemy считают SQL-запросы и время в БД в пределах
+текущего HTTP-запроса через contextvar. Статистика кешей и пулов соединений
+собирается в момент чтения /metrics.
+
+Запросы, превысившие бюджет по числу SQL-запросов (QUERY_BUDGET_COUNT) или по
+суммарному времени в БД (QUERY_BUDGET_SECONDS), пишутся в лог app.queries вместе
+с выполненными запросами - так находятся N+1 от ленивой загрузки связей.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.cache import cache_stats
+from app.core.config import settings
+from app.core.pool import pool_stats
+
+logger = logging.getLogger("app.queries")
+
+# Сколько запросов одного HTTP-запроса сохраняется для лога превышения бюджета
+MAX_LOGGED_STATEMENTS = 50
+
+registry = CollectorRegistry()
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route and status code",
+    ["method", "route", "status"],
+    registry=registry,
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=registry,
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+    registry=registry,
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in SQL per HTTP request",
+    ["method", "route"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+    registry=registry,
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Duration of individual SQL statements",
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1, 5),
+    registry=registry,
+)
+
+
+class RequestStats:
+    """Счетчики SQL текущего HTTP-запроса."""
+
+    __slots__ = ("queries", "db_time", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = []
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.db_time += elapsed
+        if len(self.statements) < MAX_LOGGED_STATEMENTS:
+            self.statements.append((statement, elapsed))
+
+    def over_budget(self) -> bool:
+        return bool(
+            (settings.QUERY_BUDGET_COUNT and self.queries > settings.QUERY_BUDGET_COUNT)
+            or (settings.QUERY_BUDGET_SECONDS and self.db_time > settings.QUERY_BUDGET_SECONDS)
+        )
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    DB_QUERY_DURATION.observe(elapsed)
+    if settings.SLOW_QUERY_SECONDS and elapsed > settings.SLOW_QUERY_SECONDS:
+        # Параметры не логируются: в них могут быть персональные данные
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+    # Обработчик выполняется в потоке пула или в greenlet run_sync, но в контексте
+    # запроса: Starlette и SQLAlchemy копируют contextvars в эти потоки и greenlet
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Подключает учет SQL-запросов к синхронному движку (для асинхронного - к sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: считает запросы, их длительность и SQL по маршрутам."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.QUERY_STATS_HEADERS:
+                    message["headers"] = list(message.get("headers", [])) + _stats_headers(
+                        stats, time.perf_counter() - start
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route_path, str(status_code)).inc()
+            HTTP_REQUEST_DURATION.labels(method, route_path).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(method, route_path).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(method, route_path).observe(stats.db_time)
+            if stats.over_budget():
+                _log_over_budget(method, scope.get("path", ""), route_path, stats)
+
+
+def _stats_headers(stats: RequestStats, elapsed: float):
+    server_timing = 'db;dur={:.1f};desc="{} queries", app;dur={:.1f}'.format(
+        stats.db_time * 1000, stats.queries, elapsed * 1000
+    )
+    return [
+        (b"x-query-count", str(stats.queries).encode()),
+        (b"server-timing", server_timing.encode()),
+    ]
+
+
+def _log_over_budget(method: str, path: str, route: str, stats: RequestStats) -> None:
+    statements = "\n".join(
+        f"  {elapsed * 1000:.1f} ms  {statement}" for statement, elapsed in stats.statements
+    )
+    logger.warning(
+        "Query budget exceeded: %s %s (route %s): %d queries, %.1f ms in SQL\n%s",
+        method,
+        path,
+        route,
+        stats.queries,
+        stats.db_time * 1000,
+        statements,
+    )
+
+
+class _RuntimeCollector:
+    """Статистика кешей и пулов соединений на момент чтения метрик."""
+
+    def collect(self):
+        from app.core.database import async_engine, engine
+
+        caches = cache_stats()
+        for name, help_text, key, family in (
+            ("app_cache_entries", "Entries in in-process cache", "size", GaugeMetricFamily),
+            ("app_cache_hits", "In-process cache hits", "hits", CounterMetricFamily),
+            ("app_cache_misses", "In-process cache misses", "misses", CounterMetricFamily),
+            ("app_cache_evictions", "In-process cache evictions", "evictions", CounterMetricFamily),
+        ):
+            metric = family(name, help_text, labels=["cache"])
+            for cache_name, stats in caches.items():
+                metric.add_metric([cache_name], stats[key])
+            yield metric
+
+        pools = {"sync": pool_stats(engine.pool)}
+        if async_engine is not None:
+            pools["async"] = pool_stats(async_engine.pool)
+        for name, help_text, key, family in (
+            ("db_pool_size", "Configured pool size", "size", GaugeMetricFamily),
+            ("db_pool_checked_out", "Connections in use", "checked_out", GaugeMetricFamily),
+            ("db_pool_checked_in", "Idle connections in the pool", "checked_in", GaugeMetricFamily),
+            ("db_pool_overflow", "Connections above pool size", "overflow", GaugeMetricFamily),
+            ("db_pool_checkouts", "Connection checkouts", "checkouts", CounterMetricFamily),
+            ("db_pool_timeouts", "Connection checkout timeouts", "timeouts", CounterMetricFamily),
+            ("db_pool_wait_max_seconds", "Longest connection wait", "wait_max_ms", GaugeMetricFamily),
+            ("db_pool_wait_p95_seconds", "p95 of recent connection waits", "wait_p95_ms", GaugeMetricFamily),
+        ):
+            metric = family(name, help_text, labels=["engine"])
+            for engine_name, stats in pools.items():
+                if stats and key in stats:
+                    value = stats[key] / 1000 if key.endswith("_ms") else stats[key]
+                    metric.add_metric([engine_name], value)
+            yield metric
+
+
+registry.register(_RuntimeCollector())
+
+
+def render_metrics() -> bytes:
+    return generate_latest(registry)
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
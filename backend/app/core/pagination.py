@@ -0,0 +1,65 @@
+"""
+Курсорная (keyset) пагинация.
+
+Курсор - непрозрачная для клиента строка (base64url от JSON-массива значений
+ключа сортировки последней записи страницы). Следующая страница выбирается
+условием "ключ строго после курсора" по индексу, поэтому стоимость запроса
+не растет с номером страницы, в отличие от OFFSET.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(value: Any, kind: type) -> Any:
+    if kind is datetime:
+        return datetime.fromisoformat(value)
+    if kind is float and isinstance(value, int):
+        return float(value)
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise TypeError(f"Expected {kind.__name__}")
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: Optional[str], kinds: Sequence[type]) -> Optional[Tuple]:
+    """
+    Разбирает курсор в кортеж значений указанных типов.
+    Поврежденный или чужой курсор приводит к ошибке 400.
+    """
+    if cursor is None:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(kinds):
+            raise ValueError("Cursor shape mismatch")
+        return tuple(_decode_value(value, kind) for value, kind in zip(values, kinds))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_cursor(
+    response: Response,
+    items: Sequence[Any],
+    limit: int,
+    key: Callable[[Any], Sequence[Any]],
+) -> None:
+    """Передает курсор следующей страницы в заголовке, если страница заполнена целиком."""
+    if items and len(items) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(items[-1]))
@@ -0,0 +1,107 @@
+"""
+Пул соединений с БД с учетом времени ожидания соединения.
+
+Пул каждого воркера uvicorn держит до DB_POOL_SIZE + DB_MAX_OVERFLOW соединений,
+поэтому сумма по всем воркерам должна укладываться в max_connections PostgreSQL.
+Время ожидания соединения показывает, хватает ли пула под текущую нагрузку:
+рост ожидания и таймауты означают исчерпание пула.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+# Сколько последних ожиданий хранится для расчета перцентилей
+_RECENT_WAITS = 1024
+
+
+class PoolWaitStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._recent: "deque[float]" = deque(maxlen=_RECENT_WAITS)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self._recent.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = sorted(self._recent)
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": self.wait_total / attempts * 1000 if attempts else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+                "wait_p50_ms": _percentile(recent, 0.50) * 1000,
+                "wait_p95_ms": _percentile(recent, 0.95) * 1000,
+                "wait_p99_ms": _percentile(recent, 0.99) * 1000,
+            }
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+class _TimedPoolMixin:
+    """Замеряет время получения соединения из пула (ожидание, создание, pre-ping)."""
+
+    wait_stats: PoolWaitStats
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(pool: Optional[Pool]) -> Optional[Dict[str, Any]]:
+    """Текущее состояние пула и статистика ожидания соединений."""
+    if pool is None:
+        return None
+    stats: Dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            }
+        )
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        stats.update(wait_stats.snapshot())
+    return stats
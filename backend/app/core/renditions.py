@@ -0,0 +1,163 @@
+"""
+Генерация уменьшенных копий изображений товаров.
+
+Ресайз и перекодирование выполняются в пуле процессов, чтобы не занимать
+ни поток обработки запроса, ни GIL воркера uvicorn. Результаты сохраняются
+в хранилище blob-объектов как производные варианты исходного изображения.
+
+Загрузка проверяет только сигнатуру формата, поэтому файл может оказаться
+нераспознаваемым для Pillow. Хеши таких изображений запоминаются в ограниченном
+кеше (IMAGE_RENDITION_FAILURE_TTL_SECONDS), и повторные запросы ?size= не ставят
+их в очередь снова. Повторное сохранение изображения сбрасывает отметку.
+"""
+import io
+import logging
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.storage import get_blob_store
+
+logger = logging.getLogger(__name__)
+
+# Максимальная сторона изображения в пикселях для каждого размера
+RENDITION_SIZES = {
+    "thumb": 160,
+    "card": 480,
+    "full": 1600,
+}
+
+RENDITION_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+_pending = set()
+_pending_lock = threading.Lock()
+# Изображения, варианты которых построить не удалось
+_failed = TTLCache(
+    "rendition_failures",
+    settings.IMAGE_RENDITION_FAILURE_MAX_ENTRIES,
+    settings.IMAGE_RENDITION_FAILURE_TTL_SECONDS,
+)
+
+
+def rendition_name(size: str, fmt: str) -> str:
+    return f"{size}.{fmt}"
+
+
+def renditions_complete(image_hash: str) -> bool:
+    store = get_blob_store()
+    return all(
+        store.has_rendition(image_hash, rendition_name(size, fmt))
+        for size in RENDITION_SIZES
+        for fmt in RENDITION_FORMATS
+    )
+
+
+def render_image(data: bytes) -> Dict[str, bytes]:
+    """Строит все варианты изображения. Выполняется в дочернем процессе."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as source:
+        source.load()
+        renditions = {}
+        for size, max_side in RENDITION_SIZES.items():
+            image = source.copy()
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+            for fmt, (pil_format, _, options) in RENDITION_FORMATS.items():
+                converted = image
+                if pil_format == "JPEG" and image.mode != "RGB":
+                    # JPEG не поддерживает прозрачность - подкладываем белый фон
+                    converted = Image.new("RGB", image.size, (255, 255, 255))
+                    rgba = image.convert("RGBA")
+                    converted.paste(rgba, mask=rgba.getchannel("A"))
+                elif pil_format == "WEBP" and image.mode not in ("RGB", "RGBA"):
+                    converted = image.convert("RGBA")
+                buffer = io.BytesIO()
+                converted.save(buffer, format=pil_format, **options)
+                renditions[rendition_name(size, fmt)] = buffer.getvalue()
+        return renditions
+
+
+def _get_executor() -> Executor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_RENDITION_WORKERS,
+                mp_context=get_context("spawn"),
+            )
+        return _executor
+
+
+def _store_renditions(image_hash: str, future: Future) -> None:
+    try:
+        renditions = future.result()
+    except Exception:
+        # Изображение не декодируется - повторять попытку бесполезно
+        _failed.set(image_hash, True)
+        with _pending_lock:
+            _pending.discard(image_hash)
+        logger.exception("Failed to build renditions for image %s", image_hash)
+        return
+    try:
+        store = get_blob_store()
+        for name, data in renditions.items():
+            store.put_rendition(image_hash, name, data)
+    except Exception:
+        logger.exception("Failed to store renditions for image %s", image_hash)
+    finally:
+        with _pending_lock:
+            _pending.discard(image_hash)
+
+
+def schedule_renditions(image_hash: Optional[str], retry_failed: bool = False) -> None:
+    """
+    Ставит построение вариантов изображения в очередь и сразу возвращает управление.
+    Повторный вызов для изображения, которое уже обрабатывается или которое
+    недавно не удалось обработать, игнорируется. retry_failed=True (изображение
+    только что сохранено заново) сбрасывает отметку о неудаче.
+    """
+    if not image_hash:
+        return
+    if retry_failed:
+        _failed.invalidate(image_hash)
+    elif _failed.get(image_hash):
+        return
+    if renditions_complete(image_hash):
+        return
+    with _pending_lock:
+        if image_hash in _pending:
+            return
+        _pending.add(image_hash)
+
+    try:
+        with get_blob_store().open(image_hash) as f:
+            data = f.read()
+        if settings.IMAGE_RENDITION_WORKERS <= 0:
+            future = Future()
+            try:
+                future.set_result(render_image(data))
+            except Exception as exc:
+                future.set_exception(exc)
+        else:
+            future = _get_executor().submit(render_image, data)
+    except Exception:
+        with _pending_lock:
+            _pending.discard(image_hash)
+        logger.exception("Failed to schedule renditions for image %s", image_hash)
+        return
+    future.add_done_callback(lambda f: _store_renditions(image_hash, f))
+
+
+def shutdown_renditions() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
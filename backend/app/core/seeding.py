@@ -0,0 +1,245 @@
+"""
+Генератор синтетического каталога для нагрузочного тестирования.
+
+Данные пишутся пакетами: в PostgreSQL через COPY FROM STDIN, в остальных
+СУБД через executemany. Строки генерируются потоково, поэтому в памяти
+одновременно находится не больше одного пакета. Генератор детерминирован:
+одинаковый seed на пустой базе дает одинаковые данные.
+
+Номер seed входит в названия типов товаров и логины пользователей (они
+уникальны), поэтому данные с разными seed можно загружать в одну базу, а
+повторная загрузка с тем же seed отклоняется до вставки первой строки.
+"""
+import csv
+import io
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.core.security import get_password_hash
+from app.core.storage import get_blob_store
+from app.core.versioning import VERSIONED_TABLES, bump_version, ensure_versions
+from app.crud.review import rebuild_review_stats
+from app.models.product import Product
+from app.models.product_type import ProductType
+from app.models.review import Review
+from app.models.user import User
+
+DEFAULT_BATCH_SIZE = 10_000
+# Пароль всех сгенерированных пользователей. Хеш bcrypt считается один раз:
+# миллион хеширований занял бы часы
+SYNTHETIC_PASSWORD = "password"
+
+# Отзывы распределяются по году до этой даты (не от текущего времени - ради воспроизводимости)
+_REVIEWS_UNTIL = datetime(2026, 1, 1)
+
+_IMAGES_DIR = os.path.join(os.path.dirname(__file__), "..", "static", "images")
+
+_MATERIALS = ["золотое", "серебряное", "платиновое", "титановое", "палладиевое"]
+_STONES = ["изумрудом", "сапфиром", "рубином", "бриллиантом", "жемчугом", "аметистом", "топазом"]
+_STYLES = ["Классика", "Модерн", "Винтаж", "Арт-деко", "Минимализм", "Барокко", "Этника"]
+_WORDS = ["Сияние", "Мечта", "Гармония", "Вечность", "Нежность", "Рассвет", "Звезда", "Волна"]
+_REVIEW_TEXTS = [
+    "Отличное качество, рекомендую",
+    "Доставили быстро, все как на фото",
+    "Красивое украшение, но пришлось подождать",
+    "Размер не подошел, обменяли без проблем",
+    "Камень тусклее, чем ожидал",
+    "Лучший подарок, жена в восторге",
+]
+
+
+def _batches(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy(engine: Engine, table, columns: Sequence[str], batch: List[tuple]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow(
+            # Пустое поле без кавычек в формате csv означает NULL
+            "" if value is None else value.isoformat() if isinstance(value, datetime) else value
+            for value in row
+        )
+    buffer.seek(0)
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def bulk_insert(
+    engine: Engine,
+    table,
+    columns: Sequence[str],
+    rows: Iterable[tuple],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[Callable[[str, int], None]] = None,
+) -> int:
+    """Вставляет строки пакетами по batch_size; каждый пакет - отдельная транзакция."""
+    use_copy = engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+    statement = insert(table)
+    inserted = 0
+    for batch in _batches(rows, batch_size):
+        if use_copy:
+            _copy(engine, table, columns, batch)
+        else:
+            with engine.begin() as conn:
+                conn.execute(statement, [dict(zip(columns, row)) for row in batch])
+        inserted += len(batch)
+        if progress:
+            progress(table.name, inserted)
+    return inserted
+
+
+def _ids(engine: Engine, column) -> List[int]:
+    with engine.connect() as conn:
+        return conn.execute(select(column).order_by(column)).scalars().all()
+
+
+def _demo_image_hashes() -> List[str]:
+    """Демонстрационные изображения в хранилище; товары ссылаются на них повторно."""
+    store = get_blob_store()
+    hashes = []
+    for filename in sorted(os.listdir(_IMAGES_DIR)):
+        with open(os.path.join(_IMAGES_DIR, filename), "rb") as f:
+            hashes.append(store.put(f.read()))
+    return hashes
+
+
+def _seed_already_loaded(engine: Engine, seed: int, product_types: int, users: int) -> bool:
+    with engine.connect() as conn:
+        if product_types and conn.execute(
+            select(ProductType.id).where(ProductType.name.like(f"% {seed}-%")).limit(1)
+        ).first():
+            return True
+        if users and conn.execute(
+            select(User.id).where(User.login.like(f"user{seed}-%")).limit(1)
+        ).first():
+            return True
+    return False
+
+
+def generate_catalog(
+    engine: Engine,
+    product_types: int = 0,
+    products: int = 0,
+    users: int = 0,
+    reviews: int = 0,
+    seed: int = 0,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    with_images: bool = True,
+    progress: Optional[Callable[[str, int], None]] = None,
+) -> Dict[str, int]:
+    """
+    Добавляет в базу синтетические типы товаров, товары, пользователей и отзывы.
+    Товары распределяются по всем типам в базе, отзывы - по всем пользователям.
+    Возвращает число добавленных строк по таблицам. Если данные с этим seed уже
+    загружены, ничего не добавляет и выбрасывает ValueError.
+    """
+    if _seed_already_loaded(engine, seed, product_types, users):
+        raise ValueError(
+            f"Synthetic data for seed {seed} is already loaded; "
+            "use another --seed or an empty database"
+        )
+    rng = random.Random(seed)
+    counts = {}
+
+    counts["product_types"] = bulk_insert(
+        engine,
+        ProductType.__table__,
+        ("name",),
+        ((f"{rng.choice(_STYLES)} {seed}-{i}",) for i in range(product_types)),
+        batch_size,
+        progress,
+    )
+
+    password_hash = get_password_hash(SYNTHETIC_PASSWORD)
+    counts["users"] = bulk_insert(
+        engine,
+        User.__table__,
+        ("login", "password", "is_superuser"),
+        ((f"user{seed}-{i}", password_hash, False) for i in range(users)),
+        batch_size,
+        progress,
+    )
+
+    type_ids = _ids(engine, ProductType.id)
+    if products and not type_ids:
+        raise ValueError("No product types to attach products to")
+    image_hashes = _demo_image_hashes() if with_images and products else []
+
+    def product_rows():
+        for i in range(products):
+            material, stone = rng.choice(_MATERIALS), rng.choice(_STONES)
+            yield (
+                rng.choice(type_ids),
+                f"{rng.choice(_WORDS)} {rng.choice(_STYLES)} №{seed}-{i}",
+                f"{material.capitalize()} украшение с {stone}",
+                round(rng.uniform(1_000, 500_000), 2),
+                rng.choice(image_hashes) if image_hashes else None,
+            )
+
+    counts["products"] = bulk_insert(
+        engine,
+        Product.__table__,
+        ("product_type_id", "name", "description", "price", "image_hash"),
+        product_rows(),
+        batch_size,
+        progress,
+    )
+
+    user_ids = _ids(engine, User.id)
+    if reviews and not user_ids:
+        raise ValueError("No users to attach reviews to")
+
+    def review_rows():
+        for _ in range(reviews):
+            yield (
+                rng.choice(user_ids),
+                # Оценки смещены к высоким, как в реальных отзывах
+                rng.choices((1, 2, 3, 4, 5), weights=(5, 5, 10, 30, 50))[0],
+                rng.choice(_REVIEW_TEXTS),
+                _REVIEWS_UNTIL - timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+            )
+
+    counts["reviews"] = bulk_insert(
+        engine,
+        Review.__table__,
+        ("user_id", "rating", "text", "created_at"),
+        review_rows(),
+        batch_size,
+        progress,
+    )
+
+    with Session(engine) as db:
+        # ETag и кеши каталога должны увидеть новые данные
+        ensure_versions(db)
+        bump_version(db, *VERSIONED_TABLES)
+        db.commit()
+        if counts["reviews"]:
+            rebuild_review_stats(db)
+
+    if engine.dialect.name == "postgresql":
+        # Свежая статистика планировщика, иначе первые запросы пойдут по плохим планам
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+    return counts
@@ -0,0 +1,39 @@
+"""
+Быстрая сериализация ответов-списков.
+
+Для эндпоинта с response_model FastAPI заново проверяет возвращенный список,
+превращает его в dict'ы и кодирует их в JSON - три прохода по всем строкам
+на Python-уровне. ListSerializer делает это одним вызовом заранее
+построенного TypeAdapter: проверка (с чтением атрибутов ORM-объектов) и
+кодирование в JSON-байты выполняются в pydantic-core. Готовые снимки
+(ProductResponse из кеша каталога) повторно не проверяются.
+
+Остальные ответы кодируются orjson (ORJSONResponse - класс ответа приложения
+по умолчанию).
+"""
+from typing import Generic, List, Sequence, Type, TypeVar
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+T = TypeVar("T", bound=BaseModel)
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+class ListSerializer(Generic[T]):
+    def __init__(self, schema: Type[T]):
+        self.adapter = TypeAdapter(List[schema])
+
+    def dump_json(self, items: Sequence) -> bytes:
+        return self.adapter.dump_json(self.adapter.validate_python(items, from_attributes=True))
+
+    def response(self, items: Sequence, response: Response) -> Response:
+        """
+        Готовый ответ со списком. Заголовки, уже проставленные эндпоинтом
+        (ETag, X-Next-Cursor), переносятся в ответ.
+        """
+        return Response(
+            content=self.dump_json(items),
+            media_type=JSON_MEDIA_TYPE,
+            headers=dict(response.headers),
+        )
@@ -0,0 +1,206 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import BinaryIO, Iterator, Optional
+from app.core.config import settings
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+_RENDITION_RE = re.compile(r"^[a-z]+\.[a-z]+$")
+_CHUNK_SIZE = 64 * 1024
+
+
+class BlobStore(ABC):
+    """
+    Хранилище бинарных объектов с адресацией по содержимому.
+    Ключом объекта является sha256 его содержимого, поэтому одинаковые
+    изображения хранятся в единственном экземпляре.
+    """
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        """Сохраняет данные и возвращает их sha256."""
+
+    @abstractmethod
+    def put_stream(self, stream: BinaryIO) -> str:
+        """Сохраняет содержимое файлового объекта, не загружая его целиком в память."""
+
+    @abstractmethod
+    def open(self, digest: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def exists(self, digest: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, digest: str) -> None:
+        """Удаляет blob вместе со всеми производными от него вариантами."""
+
+    @abstractmethod
+    def put_rendition(self, digest: str, name: str, data: bytes) -> None:
+        """Сохраняет производный вариант (например, уменьшенную копию) blob-объекта."""
+
+    @abstractmethod
+    def open_rendition(self, digest: str, name: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def has_rendition(self, digest: str, name: str) -> bool:
+        ...
+
+    @abstractmethod
+    def iter_digests(self) -> Iterator[str]:
+        ...
+
+    @abstractmethod
+    def modified_at(self, digest: str) -> Optional[float]:
+        """
+        Время последнего сохранения blob-объекта (unix time), None - объекта нет.
+        Повторное сохранение существующего объекта тоже обновляет это время.
+        """
+
+    def path(self, digest: str) -> Optional[str]:
+        """
+        Путь к файлу в локальной файловой системе, если хранилище его предоставляет.
+        Позволяет отдавать файл через sendfile без копирования в память процесса.
+        """
+        return None
+
+    def rendition_path(self, digest: str, name: str) -> Optional[str]:
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, digest: str) -> str:
+        if not _DIGEST_RE.match(digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def _renditions_dir(self, digest: str) -> str:
+        if not _DIGEST_RE.match(digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return os.path.join(self.root, "renditions", digest[:2], digest)
+
+    def _rendition_path(self, digest: str, name: str) -> str:
+        if not _RENDITION_RE.match(name):
+            raise ValueError(f"Invalid rendition name: {name!r}")
+        return os.path.join(self._renditions_dir(digest), name)
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Пишем во временный файл и атомарно переименовываем,
+        # чтобы читатели никогда не видели частично записанный файл
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        # Повторно сохраненный blob получает свежее время изменения: сборщик
+        # неиспользуемых файлов не удалит его, пока товар с ним еще не записан
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not self._touch(path):
+            self._write_atomic(path, data)
+        return digest
+
+    def put_stream(self, stream: BinaryIO) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        hasher = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: stream.read(_CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+                    f.write(chunk)
+            digest = hasher.hexdigest()
+            path = self._path(digest)
+            if self._touch(path):
+                os.unlink(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest
+
+    def open(self, digest: str) -> BinaryIO:
+        return open(self._path(digest), "rb")
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def delete(self, digest: str) -> None:
+        try:
+            os.unlink(self._path(digest))
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(self._renditions_dir(digest), ignore_errors=True)
+
+    def put_rendition(self, digest: str, name: str, data: bytes) -> None:
+        self._write_atomic(self._rendition_path(digest, name), data)
+
+    def open_rendition(self, digest: str, name: str) -> BinaryIO:
+        return open(self._rendition_path(digest, name), "rb")
+
+    def has_rendition(self, digest: str, name: str) -> bool:
+        return os.path.exists(self._rendition_path(digest, name))
+
+    def iter_digests(self) -> Iterator[str]:
+        for _, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if _DIGEST_RE.match(filename):
+                    yield filename
+
+    def modified_at(self, digest: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(self._path(digest))
+        except FileNotFoundError:
+            return None
+
+    def path(self, digest: str) -> Optional[str]:
+        path = self._path(digest)
+        return path if os.path.exists(path) else None
+
+    def rendition_path(self, digest: str, name: str) -> Optional[str]:
+        path = self._rendition_path(digest, name)
+        return path if os.path.exists(path) else None
+
+
+_BACKENDS = {
+    "local": lambda: LocalBlobStore(settings.MEDIA_ROOT),
+}
+
+
+@lru_cache
+def get_blob_store() -> BlobStore:
+    try:
+        return _BACKENDS[settings.BLOB_STORE_BACKEND]()
+    except KeyError:
+        raise ValueError(f"Unknown blob store backend: {settings.BLOB_STORE_BACKEND}")
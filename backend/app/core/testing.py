@@ -0,0 +1,55 @@
+"""
+Помощники для тестов.
+
+    from app.core.testing import assert_max_queries
+
+    with assert_max_queries(2):
+        client.get("/reviews/")
+
+Считаются все SQL-запросы к движкам приложения внутри блока, в том числе
+выполненные в потоках TestClient и в greenlet асинхронной сессии.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
+from sqlalchemy import event
+from app.core.database import async_engine, engine
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.statements.append(statement)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    counter = QueryCounter()
+    engines = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+    for target in engines:
+        event.listen(target, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", counter)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryCounter]:
+    """Проверяет, что код внутри блока выполнил не больше limit SQL-запросов."""
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        statements = "\n".join(f"  {statement}" for statement in counter.statements)
+        raise AssertionError(
+            f"Expected at most {limit} queries, got {counter.count}:\n{statements}"
+        )
@@ -0,0 +1,170 @@
+"""
+Потоковый прием изображений в формате multipart/form-data.
+
+Тело запроса разбирается по мере поступления: данные файла сразу пишутся
+во временный SpooledTemporaryFile (в памяти хранится не больше
+UPLOAD_SPOOL_MAX_BYTES), размер ограничивается MAX_IMAGE_UPLOAD_BYTES,
+а тип содержимого определяется по сигнатуре первых байтов, а не по
+заголовку Content-Type клиента.
+"""
+from tempfile import SpooledTemporaryFile
+from typing import List, Optional
+from fastapi import HTTPException, Request, status
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.images import sniff_image_type
+
+# Запас на заголовки частей и границы multipart поверх размера самого файла
+_MULTIPART_OVERHEAD_BYTES = 16 * 1024
+_SNIFF_BYTES = 16
+
+
+class ImageUpload:
+    def __init__(self, file: SpooledTemporaryFile, media_type: str, size: int):
+        self.file = file
+        self.media_type = media_type
+        self.size = size
+
+    def close(self):
+        self.file.close()
+
+
+class _ImageUploadParser:
+    def __init__(self, field_name: str, max_bytes: int):
+        self.field_name = field_name
+        self.max_bytes = max_bytes
+        self.file: Optional[SpooledTemporaryFile] = None
+        self.size = 0
+        self.head = b""
+        self.media_type: Optional[str] = None
+        self._in_target = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._chunks: List[bytes] = []
+
+    def on_part_begin(self):
+        self._disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        self._in_target = (
+            options.get(b"name") == self.field_name.encode() and b"filename" in options
+        )
+        if self._in_target and self.file is not None:
+            raise HTTPException(status_code=400, detail="Only one image may be uploaded")
+        if self._in_target:
+            self.file = SpooledTemporaryFile(max_size=settings.UPLOAD_SPOOL_MAX_BYTES)
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if not self._in_target:
+            return
+        chunk = data[start:end]
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Image is too large",
+            )
+        if self.media_type is None:
+            self.head += chunk[: _SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= _SNIFF_BYTES:
+                self._sniff()
+        self._chunks.append(chunk)
+
+    def on_part_end(self):
+        if self._in_target and self.media_type is None and self.size:
+            self._sniff()
+        self._in_target = False
+
+    def _sniff(self):
+        self.media_type = sniff_image_type(self.head)
+        if self.media_type is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Unsupported image type",
+            )
+
+    def flush(self) -> List[bytes]:
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def _write_chunks(file: SpooledTemporaryFile, chunks: List[bytes]):
+    for chunk in chunks:
+        file.write(chunk)
+
+
+async def receive_image_upload(
+    request: Request, field_name: str = "image", max_bytes: Optional[int] = None
+) -> ImageUpload:
+    """
+    Принимает одно изображение из multipart-запроса.
+    Вызывающий код обязан закрыть возвращенный ImageUpload.
+    """
+    max_bytes = max_bytes or settings.MAX_IMAGE_UPLOAD_BYTES
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected multipart/form-data",
+        )
+
+    # Заведомо слишком большой запрос отклоняем, не читая тело
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > max_bytes + _MULTIPART_OVERHEAD_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Image is too large",
+            )
+
+    handler = _ImageUploadParser(field_name, max_bytes)
+    parser = MultipartParser(
+        boundary,
+        {
+            "on_part_begin": handler.on_part_begin,
+            "on_part_data": handler.on_part_data,
+            "on_part_end": handler.on_part_end,
+            "on_header_field": handler.on_header_field,
+            "on_header_value": handler.on_header_value,
+            "on_header_end": handler.on_header_end,
+            "on_headers_finished": handler.on_headers_finished,
+        },
+    )
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            chunks = handler.flush()
+            if chunks:
+                # Запись на диск (после превышения порога спулинга) не должна
+                # блокировать цикл событий
+                await run_in_threadpool(_write_chunks, handler.file, chunks)
+        parser.finalize()
+    except BaseException:
+        if handler.file is not None:
+            handler.file.close()
+        raise
+
+    if handler.file is None or handler.size == 0:
+        if handler.file is not None:
+            handler.file.close()
+        raise HTTPException(status_code=400, detail=f"Missing file field '{field_name}'")
+
+    handler.file.seek(0)
+    return ImageUpload(handler.file, handler.media_type, handler.size)
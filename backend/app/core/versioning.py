@@ -0,0 +1,90 @@
+"""
+Версии таблиц для условных GET-запросов.
+
+Каждая функция записи в app.crud увеличивает версию затронутой таблицы
+в той же транзакции, что и само изменение. ETag ответа строится из версий
+таблиц, от которых он зависит, и параметров запроса, поэтому проверка
+If-None-Match стоит одного чтения по первичному ключу: строки данных
+не запрашиваются и ничего не сериализуется.
+"""
+import hashlib
+from typing import Dict, Optional, Sequence, Tuple
+from fastapi import Request, Response
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.core.database import run_db
+from app.models.table_version import TableVersion
+
+VERSIONED_TABLES = ("products", "product_types", "reviews", "users")
+
+
+def ensure_versions(db: Session) -> None:
+    existing = {name for (name,) in db.query(TableVersion.name)}
+    for name in VERSIONED_TABLES:
+        if name not in existing:
+            db.add(TableVersion(name=name, version=0))
+    db.commit()
+
+
+def bump_version(db: Session, *tables: str) -> None:
+    """Увеличивает версии таблиц. Фиксируется вместе с текущей транзакцией."""
+    db.execute(
+        update(TableVersion)
+        .where(TableVersion.name.in_(tables))
+        .values(version=TableVersion.version + 1)
+    )
+
+
+def get_versions(db: Session, tables: Sequence[str]) -> dict:
+    rows = db.query(TableVersion.name, TableVersion.version).filter(
+        TableVersion.name.in_(tables)
+    )
+    return dict(rows.all())
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    return bool(if_none_match) and _matches(if_none_match, etag)
+
+
+async def conditional_get(
+    request: Request, response: Response, db: Session, tables: Sequence[str]
+) -> Optional[Response]:
+    """
+    Проставляет ETag в ответ. Если клиент прислал совпадающий If-None-Match,
+    возвращает готовый ответ 304, который эндпоинт должен сразу отдать.
+    """
+    not_modified, _ = await versioned_get(request, response, db, tables)
+    return not_modified
+
+
+async def versioned_get(
+    request: Request, response: Response, db: Session, tables: Sequence[str]
+) -> Tuple[Optional[Response], Dict[str, int]]:
+    """
+    То же, что conditional_get, но возвращает и версии таблиц, из которых построен
+    ETag. Эндпоинты, отдающие данные из кеша, передают версию в app.crud: она входит
+    в ключ кеша, поэтому тело ответа никогда не старше своего ETag.
+    """
+    versions = await run_db(db, get_versions, tables)
+    scope = f"{request.url.path}?{request.url.query}".encode()
+    etag = '"{}-{}"'.format(
+        ".".join(str(versions.get(table, 0)) for table in tables),
+        hashlib.sha1(scope).hexdigest()[:16],
+    )
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers), versions
+    response.headers.update(headers)
+    return None, versions
@@ -1,31 +1,227 @@
+import time
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import delete, insert, tuple_, update
 from sqlalchemy.orm import Session
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate
+from app.models.product_type import ProductType
+from app.schemas.product import (
+    BulkItemResult,
+    BulkResult,
+    ProductBulkUpdateItem,
+    ProductCreate,
+    ProductUpdate,
+    ProductResponse,
+)
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.fields import Fields, column_names, load_columns, project
+from app.core.storage import get_blob_store
+from app.core.versioning import bump_version
 
+# Функции этого модуля работают только с БД: в асинхронном режиме run_db выполняет
+# их в цикле событий. Запись blob-объектов и постановка уменьшенных копий в очередь -
+# файловый ввод-вывод, их выполняют роутеры через run_in_threadpool. Изображения,
+# на которые больше не ссылаются товары, при записи не удаляются: проверка ссылок
+# и удаление файла не атомарны, и параллельный запрос с тем же хешем остался бы
+# без файла. Их удаляет collect_orphaned_images (python -m app.cli collect-images)
 
-def create_product(db: Session, product: ProductCreate):
+
+# Кешируются неизменяемые снимки (ProductResponse), а не ORM-объекты,
+# привязанные к сессии конкретного запроса. Версия таблицы products (из
+# versioned_get) входит в ключ: запись, построенная до записи в другом воркере,
+# не отдается под ETag новой версии
+product_cache = TTLCache(
+    "products", settings.CATALOG_CACHE_MAX_ENTRIES, settings.CATALOG_CACHE_TTL_SECONDS
+)
+product_list_cache = TTLCache(
+    "product_lists", settings.CATALOG_CACHE_MAX_ENTRIES, settings.CATALOG_CACHE_TTL_SECONDS
+)
+
+
+def _snapshot(db_product: Optional[Product]) -> Optional[ProductResponse]:
+    return ProductResponse.model_validate(db_product) if db_product else None
+
+
+def invalidate_catalog_caches():
+    """
+    Сбрасывает кеши товаров целиком, а не записи отдельного товара: любая запись
+    увеличивает версию таблицы products, и все записи кеша старой версии (в том
+    числе списки, не содержащие измененный товар) становятся недостижимы.
+    Сброс освобождает их сразу и не дает загрузке, начатой до записи, сохранить
+    устаревший результат.
+    """
+    product_cache.clear()
+    product_list_cache.clear()
+
+
+def collect_orphaned_images(db: Session, grace_seconds: Optional[float] = None) -> int:
+    """
+    Удаляет из хранилища blob-объекты, на которые не ссылаются товары и которые
+    сохранялись не позже чем grace_seconds назад (по умолчанию
+    ORPHAN_IMAGE_GRACE_SECONDS). Свежий файл может принадлежать товару,
+    запрос на запись которого еще выполняется.
+    """
+    if grace_seconds is None:
+        grace_seconds = settings.ORPHAN_IMAGE_GRACE_SECONDS
+    # Ссылки читаются до проверки времени файлов: файл, сохраненный после
+    # этого чтения, окажется свежим и не будет удален
+    referenced = {
+        image_hash
+        for (image_hash,) in db.query(Product.image_hash)
+        .filter(Product.image_hash.isnot(None))
+        .distinct()
+    }
+    store = get_blob_store()
+    removed = 0
+    cutoff = time.time() - grace_seconds
+    for digest in list(store.iter_digests()):
+        if digest in referenced:
+            continue
+        modified_at = store.modified_at(digest)
+        if modified_at is not None and modified_at <= cutoff:
+            store.delete(digest)
+            removed += 1
+    return removed
+
+
+def create_product(db: Session, product: ProductCreate, image_hash: Optional[str] = None):
+    """image_hash - изображение product.image, уже сохраненное в хранилище."""
     db_product = Product(
         product_type_id=product.product_type_id,
         name=product.name,
         description=product.description,
         price=product.price,
-        image=product.image,
+        image_hash=image_hash,
     )
     db.add(db_product)
+    bump_version(db, "products")
     db.commit()
     db.refresh(db_product)
+    invalidate_catalog_caches()
     return db_product
 
 
-def get_product(db: Session, product_id: int):
-    return db.query(Product).filter(Product.id == product_id).first()
+def get_product(db: Session, product_id: int, version: Optional[int] = None):
+    return product_cache.get_or_load(
+        (product_id, version),
+        lambda: _snapshot(db.query(Product).filter(Product.id == product_id).first()),
+    )
+
+
+def get_products_by_ids(
+    db: Session, ids: Sequence[int], version: Optional[int] = None
+) -> Tuple[List[ProductResponse], List[int]]:
+    """
+    Товары в порядке ids (повторы отбрасываются) и список отсутствующих id.
+    Товары, которых нет в кеше, читаются одним запросом WHERE id IN (...).
+    """
+    ids = list(dict.fromkeys(ids))
+
+    def load(missing_keys):
+        loaded = dict.fromkeys(missing_keys)
+        missing = [product_id for product_id, _ in missing_keys]
+        for chunk in _chunks(missing):
+            for product in db.query(Product).filter(Product.id.in_(chunk)):
+                loaded[(product.id, version)] = _snapshot(product)
+        return loaded
+
+    found = product_cache.get_many_or_load([(product_id, version) for product_id in ids], load)
+    snapshots = [found[(product_id, version)] for product_id in ids]
+    products = [snapshot for snapshot in snapshots if snapshot is not None]
+    missing = [product_id for product_id, snapshot in zip(ids, snapshots) if snapshot is None]
+    return products, missing
+
+
+# Столбцы вычисляемых полей ProductResponse (для ?fields=)
+PRODUCT_DERIVED_COLUMNS = {"image_url": ("id", "image_hash")}
 
+PRODUCT_SORT_COLUMNS = {
+    "id": Product.id,
+    "price": Product.price,
+    "name": Product.name,
+}
 
-def get_products(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Product).offset(skip).limit(limit).all()
 
+def get_products(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple] = None,
+    product_type_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    name: Optional[str] = None,
+    sort: str = "id",
+    fields: Optional[Fields] = None,
+    version: Optional[int] = None,
+):
+    descending = sort.startswith("-")
+    column = PRODUCT_SORT_COLUMNS[sort.lstrip("-")]
+    columns = None
+    if fields is not None:
+        # Ключ сортировки загружается всегда: из него строится курсор
+        columns = column_names(
+            fields, always=("id", column.key), derived=PRODUCT_DERIVED_COLUMNS
+        )
 
-def update_product(db: Session, product_id: int, product_update: ProductUpdate):
+    def load():
+        query = db.query(Product)
+        if columns is not None:
+            query = query.options(load_columns(Product, columns))
+        if product_type_id is not None:
+            query = query.filter(Product.product_type_id == product_type_id)
+        if min_price is not None:
+            query = query.filter(Product.price >= min_price)
+        if max_price is not None:
+            query = query.filter(Product.price <= max_price)
+        if name:
+            query = query.filter(Product.name.icontains(name, autoescape=True))
+
+        # id добавляется в ключ сортировки, чтобы порядок был однозначным для курсора
+        order = [column] if column is Product.id else [column, Product.id]
+        query = query.order_by(*(c.desc() if descending else c.asc() for c in order))
+        if after is not None:
+            key = Product.id if column is Product.id else tuple_(column, Product.id)
+            bound = after[0] if column is Product.id else after
+            query = query.filter(key < bound if descending else key > bound)
+        else:
+            query = query.offset(skip)
+        products = query.limit(limit).all()
+        if columns is not None:
+            return [project(ProductResponse, p, columns) for p in products]
+        return [_snapshot(p) for p in products]
+
+    cache_key = (
+        skip, limit, after, product_type_id, min_price, max_price, name, sort, fields, version
+    )
+    return product_list_cache.get_or_load(cache_key, load)
+
+
+def product_cursor_kinds(sort: str = "id"):
+    field = sort.lstrip("-")
+    if field == "id":
+        return (int,)
+    return (float if field == "price" else str, int)
+
+
+def product_cursor(product: Product, sort: str = "id"):
+    field = sort.lstrip("-")
+    if field == "id":
+        return (product.id,)
+    return (getattr(product, field), product.id)
+
+
+def get_product_image_hash(db: Session, product_id: int):
+    return db.query(Product.image_hash).filter(Product.id == product_id).scalar()
+
+
+def update_product(
+    db: Session,
+    product_id: int,
+    product_update: ProductUpdate,
+    image_hash: Optional[str] = None,
+):
+    """image_hash - изображение product_update.image, уже сохраненное в хранилище."""
     db_product = db.query(Product).filter(Product.id == product_id).first()
     if db_product:
         if product_update.product_type_id is not None:
@@ -37,9 +233,24 @@ def update_product(db: Session, product_id: int, product_update: ProductUpdate):
         if product_update.price is not None:
             db_product.price = product_update.price
         if product_update.image is not None:
-            db_product.image = product_update.image
+            # Пустое изображение убирает картинку товара (image_hash=None)
+            db_product.image_hash = image_hash
+        bump_version(db, "products")
         db.commit()
         db.refresh(db_product)
+        invalidate_catalog_caches()
+    return db_product
+
+
+def set_product_image(db: Session, product_id: int, image_hash: str):
+    """Привязывает к товару изображение, уже сохраненное в хранилище."""
+    db_product = db.query(Product).filter(Product.id == product_id).first()
+    if db_product:
+        db_product.image_hash = image_hash
+        bump_version(db, "products")
+        db.commit()
+        db.refresh(db_product)
+        invalidate_catalog_caches()
     return db_product
 
 
@@ -47,5 +258,187 @@ def delete_product(db: Session, product_id: int):
     db_product = db.query(Product).filter(Product.id == product_id).first()
     if db_product:
         db.delete(db_product)
+        bump_version(db, "products")
         db.commit()
+        invalidate_catalog_caches()
     return db_product
+
+
+# Размер списка в условии IN при массовых операциях
+_IN_CHUNK_SIZE = 1000
+
+_APPLIED_STATUSES = {"created", "updated", "deleted"}
+
+
+def _chunks(values: Sequence, size: int = _IN_CHUNK_SIZE) -> Iterator[Sequence]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _existing_product_type_ids(db: Session, ids: Iterable[int]) -> Set[int]:
+    ids = list(set(ids))
+    found = set()
+    for chunk in _chunks(ids):
+        found.update(
+            type_id for (type_id,) in db.query(ProductType.id).filter(ProductType.id.in_(chunk))
+        )
+    return found
+
+
+def _existing_product_ids(db: Session, ids: Iterable[int]) -> Set[int]:
+    ids = list(set(ids))
+    found = set()
+    for chunk in _chunks(ids):
+        found.update(
+            product_id for (product_id,) in db.query(Product.id).filter(Product.id.in_(chunk))
+        )
+    return found
+
+
+def _bulk_result(results: List[BulkItemResult], apply: bool) -> BulkResult:
+    if not apply:
+        # Атомарный режим: при ошибке в любом элементе ничего не записывается
+        for result in results:
+            if result.status in _APPLIED_STATUSES:
+                if result.status == "created":
+                    result.id = None
+                result.status = "skipped"
+    applied = sum(1 for result in results if result.status in _APPLIED_STATUSES)
+    return BulkResult(applied=applied, failed=len(results) - applied, results=results)
+
+
+def _finish_bulk_write(db: Session):
+    bump_version(db, "products")
+    db.commit()
+    invalidate_catalog_caches()
+
+
+def bulk_create_products(
+    db: Session,
+    items: List[ProductCreate],
+    image_hashes: Sequence[Optional[str]] = (),
+    atomic: bool = False,
+) -> BulkResult:
+    """
+    Создает товары одним INSERT (executemany) в одной транзакции.
+    image_hashes - изображения элементов, уже сохраненные в хранилище (по порядку items).
+    Элементы с несуществующим типом товара не создаются; при atomic=True
+    в этом случае не создается ничего.
+    """
+    image_hashes = list(image_hashes) or [None] * len(items)
+    type_ids = _existing_product_type_ids(db, (item.product_type_id for item in items))
+    results = []
+    valid = []
+    for index, item in enumerate(items):
+        if item.product_type_id in type_ids:
+            results.append(BulkItemResult(index=index, status="created"))
+            valid.append((index, item))
+        else:
+            results.append(
+                BulkItemResult(index=index, status="invalid", error="Product type not found")
+            )
+
+    apply = bool(valid) and not (atomic and len(valid) < len(items))
+    if not apply:
+        return _bulk_result(results, apply=False)
+
+    rows = [
+        {
+            "product_type_id": item.product_type_id,
+            "name": item.name,
+            "description": item.description,
+            "price": item.price,
+            "image_hash": image_hashes[index],
+        }
+        for index, item in valid
+    ]
+    # sort_by_parameter_order: id возвращаются в порядке строк. В PostgreSQL это
+    # один пакетный INSERT ... RETURNING, SQLite выполняет строки по одной
+    ids = db.execute(
+        insert(Product).returning(Product.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+    for (index, _), product_id in zip(valid, ids):
+        results[index].id = product_id
+    _finish_bulk_write(db)
+    return _bulk_result(results, apply=True)
+
+
+def bulk_update_products(
+    db: Session,
+    items: List[ProductBulkUpdateItem],
+    image_hashes: Sequence[Optional[str]] = (),
+    atomic: bool = False,
+) -> BulkResult:
+    """
+    Изменяет товары массовым UPDATE по первичному ключу в одной транзакции.
+    Как и update_product, меняет только переданные (не null) поля.
+    image_hashes - изображения элементов, уже сохраненные в хранилище (по порядку items).
+    """
+    image_hashes = list(image_hashes) or [None] * len(items)
+    existing = _existing_product_ids(db, (item.id for item in items))
+    type_ids = _existing_product_type_ids(
+        db, (item.product_type_id for item in items if item.product_type_id is not None)
+    )
+    results = []
+    rows = []
+    seen = set()
+    for index, item in enumerate(items):
+        result = BulkItemResult(index=index, id=item.id, status="updated")
+        if item.id in seen:
+            result.status, result.error = "invalid", "Duplicate id in batch"
+        elif item.id not in existing:
+            result.status = "not_found"
+        elif item.product_type_id is not None and item.product_type_id not in type_ids:
+            result.status, result.error = "invalid", "Product type not found"
+        else:
+            values = {
+                field: getattr(item, field)
+                for field in ("product_type_id", "name", "description", "price")
+                if getattr(item, field) is not None
+            }
+            if item.image is not None:
+                values["image_hash"] = image_hashes[index]
+            if values:
+                rows.append({"id": item.id, **values})
+        seen.add(item.id)
+        results.append(result)
+
+    failed = any(result.status != "updated" for result in results)
+    if atomic and failed:
+        return _bulk_result(results, apply=False)
+    if not rows:
+        return _bulk_result(results, apply=True)
+
+    db.execute(update(Product), rows)
+    _finish_bulk_write(db)
+    return _bulk_result(results, apply=True)
+
+
+def bulk_delete_products(db: Session, ids: List[int], atomic: bool = False) -> BulkResult:
+    """Удаляет товары запросами DELETE ... WHERE id IN (...) в одной транзакции."""
+    existing = _existing_product_ids(db, ids)
+    results = []
+    to_delete = []
+    seen = set()
+    for index, product_id in enumerate(ids):
+        result = BulkItemResult(index=index, id=product_id, status="deleted")
+        if product_id in seen:
+            result.status, result.error = "invalid", "Duplicate id in batch"
+        elif product_id not in existing:
+            result.status = "not_found"
+        else:
+            to_delete.append(product_id)
+        seen.add(product_id)
+        results.append(result)
+
+    if atomic and len(to_delete) < len(ids):
+        return _bulk_result(results, apply=False)
+    if not to_delete:
+        return _bulk_result(results, apply=True)
+
+    for chunk in _chunks(to_delete):
+        db.execute(
+            delete(Product).where(Product.id.in_(chunk)).execution_options(synchronize_session=False)
+        )
+    _finish_bulk_write(db)
+    return _bulk_result(results, apply=True)
@@ -1,22 +1,87 @@
+from typing import Optional, Tuple
 from sqlalchemy.orm import Session
 from app.models.product_type import ProductType
-from app.schemas.product_type import ProductTypeCreate, ProductTypeUpdate
+from app.schemas.product_type import (
+    ProductTypeCreate,
+    ProductTypeUpdate,
+    ProductTypeResponse,
+)
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.fields import Fields, column_names, load_columns, project
+from app.core.versioning import bump_version
+
+product_type_cache = TTLCache(
+    "product_types", settings.CATALOG_CACHE_MAX_ENTRIES, settings.CATALOG_CACHE_TTL_SECONDS
+)
+product_type_list_cache = TTLCache(
+    "product_type_lists",
+    settings.CATALOG_CACHE_MAX_ENTRIES,
+    settings.CATALOG_CACHE_TTL_SECONDS,
+)
+
+
+def _snapshot(db_product_type: Optional[ProductType]) -> Optional[ProductTypeResponse]:
+    return ProductTypeResponse.model_validate(db_product_type) if db_product_type else None
+
+
+def invalidate_catalog_caches():
+    """
+    Сбрасывает кеши типов товаров целиком: версия таблицы product_types входит
+    в ключи (см. app.crud.product.invalidate_catalog_caches), и после записи
+    записи старой версии недостижимы.
+    """
+    product_type_cache.clear()
+    product_type_list_cache.clear()
 
 
 def create_product_type(db: Session, product_type: ProductTypeCreate):
     db_product_type = ProductType(name=product_type.name)
     db.add(db_product_type)
+    bump_version(db, "product_types")
     db.commit()
     db.refresh(db_product_type)
+    invalidate_catalog_caches()
     return db_product_type
 
 
-def get_product_type(db: Session, product_type_id: int):
-    return db.query(ProductType).filter(ProductType.id == product_type_id).first()
+def get_product_type(db: Session, product_type_id: int, version: Optional[int] = None):
+    return product_type_cache.get_or_load(
+        (product_type_id, version),
+        lambda: _snapshot(
+            db.query(ProductType).filter(ProductType.id == product_type_id).first()
+        ),
+    )
+
+
+def get_product_types(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple] = None,
+    fields: Optional[Fields] = None,
+    version: Optional[int] = None,
+):
+    columns = column_names(fields) if fields is not None else None
+
+    def load():
+        query = db.query(ProductType).order_by(ProductType.id)
+        if columns is not None:
+            query = query.options(load_columns(ProductType, columns))
+        if after is not None:
+            query = query.filter(ProductType.id > after[0])
+        else:
+            query = query.offset(skip)
+        product_types = query.limit(limit).all()
+        if columns is not None:
+            return [project(ProductTypeResponse, t, columns) for t in product_types]
+        return [_snapshot(t) for t in product_types]
+
+    return product_type_list_cache.get_or_load((skip, limit, after, fields, version), load)
 
 
-def get_product_types(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(ProductType).offset(skip).limit(limit).all()
+def product_type_cursor(product_type: ProductType):
+    return (product_type.id,)
 
 
 def update_product_type(
@@ -27,8 +92,10 @@ def update_product_type(
     )
     if db_product_type:
         db_product_type.name = product_type_update.name
+        bump_version(db, "product_types")
         db.commit()
         db.refresh(db_product_type)
+        invalidate_catalog_caches()
     return db_product_type
 
 
@@ -38,5 +105,7 @@ def delete_product_type(db: Session, product_type_id: int):
     )
     if db_product_type:
         db.delete(db_product_type)
+        bump_version(db, "product_types")
         db.commit()
+        invalidate_catalog_caches()
     return db_product_type
@@ -0,0 +1,79 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.core.config import settings
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def create_refresh_token(db: Session, user_id: int, family_id: Optional[str] = None) -> str:
+    """Выдает новый refresh-токен и возвращает его значение (в БД остается только хеш)."""
+    token = secrets.token_urlsafe(32)
+    db.add(
+        RefreshToken(
+            user_id=user_id,
+            token_hash=_hash_token(token),
+            family_id=family_id or secrets.token_hex(16),
+            expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    db.commit()
+    return token
+
+
+def _revoke_family(db: Session, family_id: str, now: datetime):
+    db.query(RefreshToken).filter(
+        RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None)
+    ).update({RefreshToken.revoked_at: now}, synchronize_session=False)
+
+
+def rotate_refresh_token(db: Session, token: str) -> Optional[Tuple[str, str]]:
+    """
+    Заменяет действующий refresh-токен новым из той же цепочки.
+    Возвращает (логин, новый токен) или None, если токен недействителен.
+    Предъявление уже отозванного токена означает его утечку - цепочка отзывается целиком.
+    """
+    now = datetime.utcnow()
+    db_token = (
+        db.query(RefreshToken)
+        .filter(RefreshToken.token_hash == _hash_token(token))
+        .with_for_update()
+        .first()
+    )
+    if db_token is None:
+        return None
+    if db_token.revoked_at is not None:
+        _revoke_family(db, db_token.family_id, now)
+        db.commit()
+        return None
+    if db_token.expires_at <= now:
+        return None
+
+    login = db.query(User.login).filter(User.id == db_token.user_id).scalar()
+    if login is None:
+        return None
+    db_token.revoked_at = now
+    return login, create_refresh_token(db, db_token.user_id, family_id=db_token.family_id)
+
+
+def revoke_refresh_token(db: Session, token: str) -> bool:
+    """Отзывает цепочку, к которой относится токен (выход из сессии)."""
+    db_token = db.query(RefreshToken).filter(RefreshToken.token_hash == _hash_token(token)).first()
+    if db_token is None:
+        return False
+    _revoke_family(db, db_token.family_id, datetime.utcnow())
+    db.commit()
+    return True
+
+
+def revoke_user_refresh_tokens(db: Session, user_id: int):
+    """Отзывает все refresh-токены пользователя в текущей транзакции (при смене пароля)."""
+    db.query(RefreshToken).filter(
+        RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None)
+    ).update({RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
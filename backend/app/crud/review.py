@@ -1,23 +1,228 @@
+import hashlib
+import threading
+import time
+from typing import List, Optional, Tuple
+from pydantic import TypeAdapter
+from sqlalchemy import func, tuple_, update
 from sqlalchemy.orm import Session, joinedload
 from app.models.review import Review
-from app.schemas.review import ReviewCreate
+from app.models.review_stats import ReviewStats
+from app.models.user import User
+from app.schemas.review import ReviewCreate, ReviewResponse, ReviewStatsResponse
+from app.core.config import settings
+from app.core.fields import Fields, column_names, load_columns, project
+from app.core.versioning import bump_version
 
+REVIEW_STATS_ID = 1
+RATINGS = range(1, 6)
 
-def create_review(db: Session, review: ReviewCreate, user_id: int):
+
+LATEST_REVIEWS_LIMIT = 5
+
+_review_list_adapter = TypeAdapter(List[ReviewResponse])
+
+
+class LatestReviewsBuffer:
+    """
+    Последние отзывы (для слайдера на главной) в памяти процесса вместе с готовым
+    JSON-телом ответа и его ETag: горячий путь не обращается к БД и не сериализует.
+    """
+
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self._items: List[ReviewResponse] = []
+        self._body: Optional[bytes] = None
+        self._etag = ""
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        # Загрузка из БД, начатая до добавления отзыва, не перезапишет буфер после него
+        self._generation = 0
+
+    def get(self) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            if self._body is None or self._expires_at <= time.monotonic():
+                return None
+            return self._body, self._etag
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def fill(self, items: List[ReviewResponse], generation: int) -> Tuple[bytes, str]:
+        with self._lock:
+            body, etag = self._render(items)
+            if generation == self._generation:
+                self._items = items
+                self._body, self._etag = body, etag
+                self._expires_at = time.monotonic() + self.ttl
+            return body, etag
+
+    def push(self, item: ReviewResponse) -> None:
+        with self._lock:
+            self._generation += 1
+            if self._body is None:
+                return
+            self._items = [item] + self._items[: self.size - 1]
+            self._body, self._etag = self._render(self._items)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._body = None
+            self._items = []
+
+    @staticmethod
+    def _render(items: List[ReviewResponse]) -> Tuple[bytes, str]:
+        body = _review_list_adapter.dump_json(items)
+        return body, '"latest-{}"'.format(hashlib.sha1(body).hexdigest()[:16])
+
+
+latest_reviews = LatestReviewsBuffer(LATEST_REVIEWS_LIMIT, settings.LATEST_REVIEWS_TTL_SECONDS)
+
+
+def _rating_column(rating: int):
+    return getattr(ReviewStats, f"rating_{rating}")
+
+
+def _apply_review_stats(db: Session, rating: int, delta: int = 1):
+    """
+    Учитывает добавление (delta=1) или удаление (delta=-1) отзыва в сводке.
+    Атомарный UPDATE в текущей транзакции, без чтения строки.
+    """
+    column = _rating_column(rating)
+    db.execute(
+        update(ReviewStats)
+        .where(ReviewStats.id == REVIEW_STATS_ID)
+        .values(
+            {
+                ReviewStats.count: ReviewStats.count + delta,
+                ReviewStats.rating_sum: ReviewStats.rating_sum + rating * delta,
+                column: column + delta,
+            }
+        )
+    )
+
+
+def create_review(
+    db: Session, review: ReviewCreate, user_id: int, user_login: Optional[str] = None
+):
     db_review = Review(
         user_id=user_id,
         rating=review.rating,
         text=review.text,
     )
     db.add(db_review)
+    _apply_review_stats(db, review.rating)
+    bump_version(db, "reviews")
     db.commit()
     db.refresh(db_review)
-    return db_review
+    # Связь user не загружена: логин автора передается явно
+    item = ReviewResponse(
+        id=db_review.id,
+        user_id=db_review.user_id,
+        rating=db_review.rating,
+        text=db_review.text,
+        created_at=db_review.created_at,
+        user_login=user_login,
+    )
+    latest_reviews.push(item)
+    return item
 
 
-def get_review(db: Session, review_id: int):
-    return db.query(Review).options(joinedload(Review.user)).filter(Review.id == review_id).first()
+def _review_columns(fields: Fields) -> Fields:
+    # created_at и id - ключ курсора; user_login берется из связанного пользователя
+    return column_names(fields, always=("id", "created_at"), derived={"user_login": ("user_id",)})
+
+
+def _review_query(db: Session, fields: Optional[Fields]):
+    if fields is None:
+        return db.query(Review).options(joinedload(Review.user))
+    query = db.query(Review).options(load_columns(Review, _review_columns(fields)))
+    if "user_login" in fields:
+        # Из таблицы users нужен только логин
+        query = query.options(joinedload(Review.user).load_only(User.login))
+    return query
+
+
+def _project_review(review: Review, fields: Fields) -> ReviewResponse:
+    item = project(ReviewResponse, review, _review_columns(fields))
+    if "user_login" in fields:
+        item.user_login = review.user.login if review.user else None
+    return item
+
+
+def get_review(db: Session, review_id: int, fields: Optional[Fields] = None):
+    review = _review_query(db, fields).filter(Review.id == review_id).first()
+    if fields is not None and review is not None:
+        return _project_review(review, fields)
+    return review
+
+
+def get_reviews(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple] = None,
+    fields: Optional[Fields] = None,
+):
+    """Без fields возвращает объекты Review, с fields - частичные ReviewResponse."""
+    query = _review_query(db, fields).order_by(Review.created_at.desc(), Review.id.desc())
+    if after is not None:
+        # Сравнение кортежей использует индекс ix_reviews_created_at_id
+        query = query.filter(tuple_(Review.created_at, Review.id) < after)
+    else:
+        query = query.offset(skip)
+    reviews = query.limit(limit).all()
+    if fields is not None:
+        return [_project_review(review, fields) for review in reviews]
+    return reviews
+
+
+def load_latest_reviews(db: Session) -> Tuple[bytes, str]:
+    """Холодный путь /reviews/latest: читает отзывы по индексу ix_reviews_created_at_id."""
+    generation = latest_reviews.generation
+    items = _review_list_adapter.validate_python(
+        get_reviews(db, skip=0, limit=LATEST_REVIEWS_LIMIT), from_attributes=True
+    )
+    return latest_reviews.fill(items, generation)
+
+
+def review_cursor(review: Review):
+    return (review.created_at, review.id)
+
+
+def get_review_stats(db: Session) -> ReviewStatsResponse:
+    stats = db.get(ReviewStats, REVIEW_STATS_ID)
+    if stats is None or stats.count == 0:
+        return ReviewStatsResponse(count=0, histogram={rating: 0 for rating in RATINGS})
+    return ReviewStatsResponse(
+        count=stats.count,
+        average=round(stats.rating_sum / stats.count, 2),
+        histogram={rating: getattr(stats, f"rating_{rating}") for rating in RATINGS},
+    )
+
+
+def rebuild_review_stats(db: Session) -> ReviewStatsResponse:
+    """Пересчитывает сводку по таблице reviews целиком (полный проход по отзывам)."""
+    histogram = dict.fromkeys(RATINGS, 0)
+    for rating, count in db.query(Review.rating, func.count()).group_by(Review.rating):
+        histogram[rating] = count
+
+    stats = db.query(ReviewStats).filter(ReviewStats.id == REVIEW_STATS_ID).with_for_update().first()
+    if stats is None:
+        stats = ReviewStats(id=REVIEW_STATS_ID)
+        db.add(stats)
+    stats.count = sum(histogram.values())
+    stats.rating_sum = sum(rating * count for rating, count in histogram.items())
+    for rating, count in histogram.items():
+        setattr(stats, f"rating_{rating}", count)
+    bump_version(db, "reviews")
+    db.commit()
+    return get_review_stats(db)
 
 
-def get_reviews(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Review).options(joinedload(Review.user)).order_by(Review.created_at.desc()).offset(skip).limit(limit).all()
+def ensure_review_stats(db: Session):
+    """Создает сводку при первом запуске, если ее еще нет."""
+    if db.get(ReviewStats, REVIEW_STATS_ID) is None:
+        rebuild_review_stats(db)
@@ -1,53 +1,124 @@
+from typing import Optional, Tuple
 from sqlalchemy.orm import Session
 from app.models.user import User
-from app.schemas.user import UserCreate
-from app.core.security import get_password_hash, verify_password
+from app.models.refresh_token import RefreshToken
+from app.crud.refresh_token import revoke_user_refresh_tokens
+from app.crud.review import latest_reviews
+from app.schemas.user import UserCreate, UserResponse
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.fields import Fields, column_names, load_columns, project
+from app.core.versioning import bump_version
 
 
-def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+# Пользователь, от имени которого выполняется запрос, по логину из токена.
+# Кешируется и отсутствие пользователя: токен удаленного пользователя не ходит в БД
+user_principal_cache = TTLCache(
+    "user_principals",
+    settings.AUTH_USER_CACHE_MAX_ENTRIES,
+    settings.AUTH_USER_CACHE_TTL_SECONDS,
+)
+
+
+def _snapshot(db_user: Optional[User]) -> Optional[UserResponse]:
+    return UserResponse.model_validate(db_user) if db_user else None
+
+
+def create_user(db: Session, user: UserCreate, hashed_password: str):
     db_user = User(login=user.login, password=hashed_password)
     db.add(db_user)
+    bump_version(db, "users")
     db.commit()
     db.refresh(db_user)
+    user_principal_cache.invalidate(db_user.login)
     return db_user
 
 
-def get_user(db: Session, user_id: int):
-    return db.query(User).filter(User.id == user_id).first()
+def get_user(db: Session, user_id: int, fields: Optional[Fields] = None):
+    query = db.query(User).filter(User.id == user_id)
+    if fields is None:
+        return query.first()
+    columns = column_names(fields)
+    db_user = query.options(load_columns(User, columns)).first()
+    return project(UserResponse, db_user, columns) if db_user else None
 
 
 def get_user_by_login(db: Session, login: str):
     return db.query(User).filter(User.login == login).first()
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
+def load_user_principal(db: Session, login: str) -> Optional[UserResponse]:
+    """Читает пользователя из БД и кладет снимок в user_principal_cache."""
+    return user_principal_cache.load(login, lambda: _snapshot(get_user_by_login(db, login)))
+
+
+def get_users(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple] = None,
+    fields: Optional[Fields] = None,
+):
+    query = db.query(User).order_by(User.id)
+    if fields is not None:
+        columns = column_names(fields)
+        query = query.options(load_columns(User, columns))
+    if after is not None:
+        query = query.filter(User.id > after[0])
+    else:
+        query = query.offset(skip)
+    users = query.limit(limit).all()
+    if fields is not None:
+        return [project(UserResponse, u, columns) for u in users]
+    return users
+
+
+def user_cursor(user: User):
+    return (user.id,)
 
 
-def update_user(db: Session, user_id: int, user_update: UserCreate):
+def update_user(
+    db: Session,
+    user_id: int,
+    user_update: UserCreate,
+    hashed_password: Optional[str] = None,
+):
     db_user = db.query(User).filter(User.id == user_id).first()
     if db_user:
+        old_login = db_user.login
         db_user.login = user_update.login
-        if user_update.password:
-            db_user.password = get_password_hash(user_update.password)
+        if hashed_password:
+            db_user.password = hashed_password
+            revoke_user_refresh_tokens(db, user_id)
+        bump_version(db, "users")
         db.commit()
         db.refresh(db_user)
+        user_principal_cache.invalidate(old_login)
+        user_principal_cache.invalidate(db_user.login)
+        # Логины авторов входят в буфер последних отзывов
+        latest_reviews.invalidate()
+    return db_user
+
+
+def set_password_hash(db: Session, user_id: int, hashed_password: str):
+    db_user = db.query(User).filter(User.id == user_id).first()
+    if db_user:
+        db_user.password = hashed_password
+        db.commit()
     return db_user
 
 
 def delete_user(db: Session, user_id: int):
     db_user = db.query(User).filter(User.id == user_id).first()
     if db_user:
+        login = db_user.login
+        db.query(RefreshToken).filter(RefreshToken.user_id == user_id).delete(
+            synchronize_session=False
+        )
         db.delete(db_user)
+        bump_version(db, "users")
         db.commit()
+        user_principal_cache.invalidate(login)
+        latest_reviews.invalidate()
     return db_user
 
-
-def authenticate_user(db: Session, login: str, password: str):
-    user = get_user_by_login(db, login)
-    if not user:
-        return None
-    if not verify_password(password, user.password):
-        return None
-    return user
@@ -1,35 +1,58 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import engine, Base, SessionLocal
-from app.routers import auth, users, product_types, products, reviews
-from app.core.init_data import create_test_data
+from fastapi.responses import ORJSONResponse
+from app.core.database import SessionLocal
+from app.routers import auth, users, product_types, products, reviews, admin, metrics
+from app.core.renditions import shutdown_renditions
+from app.core.security import shutdown_password_hashing
+from app.core.compression import CompressionMiddleware
+from app.core.metrics import MetricsMiddleware
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.versioning import ensure_versions
+from app.crud.review import ensure_review_stats, load_latest_reviews
 
-Base.metadata.create_all(bind=engine)
+# Ответы кодируются orjson; списки сериализуются отдельно (app.core.serialization)
+app = FastAPI(title="Products API", version="1.0.0", default_response_class=ORJSONResponse)
 
-app = FastAPI(title="Products API", version="1.0.0")
-
-# Инициализация тестовых данных при старте
+# Тестовые данные создаются командой python -m app.cli seed-demo, а не при старте
 @app.on_event("startup")
 def startup_event():
     db = SessionLocal()
     try:
-        create_test_data(db)
+        ensure_versions(db)
+        ensure_review_stats(db)
+        load_latest_reviews(db)
     finally:
         db.close()
 
+
+@app.on_event("shutdown")
+def shutdown_event():
+    shutdown_renditions()
+    shutdown_password_hashing()
+
+# Внутренний слой: сжимает готовые тела ответов эндпоинтов
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        NEXT_CURSOR_HEADER, products.MISSING_IDS_HEADER, "ETag", "X-Query-Count", "Server-Timing"
+    ],
 )
+# Добавлен последним - внешний слой, учитывает и время остальных middleware
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(product_types.router)
 app.include_router(products.router)
 app.include_router(reviews.router)
+app.include_router(admin.router)
+app.include_router(metrics.router)
 
 
 @app.get("/", summary="Health check")
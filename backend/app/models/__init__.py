@@ -2,5 +2,8 @@ from .user import User
 from .product_type import ProductType
 from .product import Product
 from .review import Review
+from .table_version import TableVersion
+from .refresh_token import RefreshToken
+from .review_stats import ReviewStats
 
-__all__ = ["User", "ProductType", "Product", "Review"]
+__all__ = ["User", "ProductType", "Product", "Review", "TableVersion", "RefreshToken", "ReviewStats"]
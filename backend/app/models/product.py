@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, LargeBinary, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -7,10 +7,13 @@ class Product(Base):
     __tablename__ = "products"
 
     id = Column(Integer, primary_key=True, index=True)
-    product_type_id = Column(Integer, ForeignKey("product_types.id"), nullable=False)
-    name = Column(String, nullable=False)
+    product_type_id = Column(
+        Integer, ForeignKey("product_types.id"), nullable=False, index=True
+    )
+    name = Column(String, nullable=False, index=True)
     description = Column(String)
-    price = Column(Float, nullable=False)
-    image = Column(LargeBinary)
+    price = Column(Float, nullable=False, index=True)
+    # sha256 изображения в хранилище blob-объектов (app.core.storage)
+    image_hash = Column(String(64), index=True)
 
     product_type = relationship("ProductType", back_populates="products")
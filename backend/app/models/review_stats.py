@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer
+from app.core.database import Base
+
+
+class ReviewStats(Base):
+    """
+    Сводка по отзывам в одной строке (id = 1): число отзывов, сумма оценок
+    и число отзывов с каждой оценкой. Обновляется в той же транзакции, что и отзывы.
+    """
+
+    __tablename__ = "review_stats"
+
+    id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_1 = Column(Integer, nullable=False, default=0)
+    rating_2 = Column(Integer, nullable=False, default=0)
+    rating_3 = Column(Integer, nullable=False, default=0)
+    rating_4 = Column(Integer, nullable=False, default=0)
+    rating_5 = Column(Integer, nullable=False, default=0)
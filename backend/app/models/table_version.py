@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from app.core.database import Base
+
+
+class TableVersion(Base):
+    """Счетчик изменений таблицы, увеличивается в той же транзакции, что и запись в нее."""
+
+    __tablename__ = "table_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
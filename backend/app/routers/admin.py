@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+from app.core.auth import get_current_superuser
+from app.core.cache import cache_stats
+from app.core.database import async_engine, engine
+from app.core.pool import pool_stats
+from app.schemas.user import UserResponse
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/cache", summary="Get in-process cache statistics")
+def read_cache_stats(
+    current_user: UserResponse = Depends(get_current_superuser),
+):
+    return cache_stats()
+
+
+@router.get("/db-pool", summary="Get database connection pool statistics")
+def read_db_pool_stats(
+    current_user: UserResponse = Depends(get_current_superuser),
+):
+    return {
+        "sync": pool_stats(engine.pool),
+        "async": pool_stats(async_engine.pool) if async_engine is not None else None,
+    }
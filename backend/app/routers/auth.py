@@ -1,43 +1,90 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import create_access_token
+from app.core.database import get_db, run_db
+from app.core.security import (
+    create_access_token,
+    get_password_hash_async,
+    verify_and_update_password_async,
+)
 from app.core.config import settings
-from app.schemas.user import UserCreate, UserResponse, UserLogin, Token
+from app.schemas.user import UserCreate, UserResponse, UserLogin, Token, RefreshTokenRequest
 from app.crud import user as crud_user
+from app.crud import refresh_token as crud_refresh_token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _token_response(login: str, refresh_token: str) -> dict:
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": login}, expires_delta=access_token_expires
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+    }
+
+
 @router.post("/register", response_model=Token, summary="Register new user")
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = crud_user.get_user_by_login(db, login=user.login)
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_db(db, crud_user.get_user_by_login, login=user.login)
     if db_user:
         raise HTTPException(status_code=400, detail="Login already registered")
 
-    new_user = crud_user.create_user(db=db, user=user)
+    hashed_password = await get_password_hash_async(user.password)
+    new_user = await run_db(
+        db, crud_user.create_user, user=user, hashed_password=hashed_password
+    )
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": new_user.login}, expires_delta=access_token_expires
+    refresh_token = await run_db(
+        db, crud_refresh_token.create_refresh_token, user_id=new_user.id
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return _token_response(new_user.login, refresh_token)
 
 
 @router.post("/login", response_model=Token, summary="Login user")
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = crud_user.authenticate_user(
-        db, user_credentials.login, user_credentials.password
+async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+    user = await run_db(db, crud_user.get_user_by_login, login=user_credentials.login)
+    verified, new_hash = (
+        await verify_and_update_password_async(user_credentials.password, user.password)
+        if user
+        else (False, None)
     )
-    if not user:
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect login or password",
         )
+    if new_hash:
+        # Пароль известен только в момент входа - тогда и обновляем устаревший хеш
+        await run_db(
+            db, crud_user.set_password_hash, user_id=user.id, hashed_password=new_hash
+        )
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.login}, expires_delta=access_token_expires
+    refresh_token = await run_db(
+        db, crud_refresh_token.create_refresh_token, user_id=user.id
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return _token_response(user.login, refresh_token)
+
+
+@router.post("/refresh", response_model=Token, summary="Refresh access token")
+async def refresh(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """Новая пара токенов по refresh-токену без проверки пароля; старый refresh-токен отзывается"""
+    rotated = await run_db(
+        db, crud_refresh_token.rotate_refresh_token, token=request.refresh_token
+    )
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+    login, refresh_token = rotated
+    return _token_response(login, refresh_token)
+
+
+@router.post("/logout", summary="Revoke refresh token")
+async def logout(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+    await run_db(db, crud_refresh_token.revoke_refresh_token, token=request.refresh_token)
+    return {"message": "Logged out successfully"}
@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Response
+from app.core.metrics import METRICS_CONTENT_TYPE, render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", summary="Prometheus metrics", include_in_schema=False)
+def read_metrics():
+    # Заголовок задается целиком: с media_type Starlette добавил бы второй charset
+    return Response(content=render_metrics(), headers={"Content-Type": METRICS_CONTENT_TYPE})
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from typing import List, Optional
+from app.core.database import get_db, run_db
+from app.core.fields import fields_response, parse_fields
+from app.core.serialization import ListSerializer
+from app.core.pagination import decode_cursor, set_next_cursor
+from app.core.versioning import versioned_get
 from app.core.auth import get_current_user
 from app.schemas.product_type import (
     ProductTypeCreate,
@@ -9,30 +13,55 @@ from app.schemas.product_type import (
     ProductTypeResponse,
 )
 from app.crud import product_type as crud_product_type
-from app.models.user import User
+from app.schemas.user import UserResponse
 
 router = APIRouter(prefix="/product_types", tags=["product-types"])
 
+product_type_list_serializer = ListSerializer(ProductTypeResponse)
+
 
 @router.post("/", response_model=ProductTypeResponse, summary="Create product type")
-def create_product_type(
+async def create_product_type(
     product_type: ProductTypeCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    return crud_product_type.create_product_type(db=db, product_type=product_type)
+    return await run_db(
+        db, crud_product_type.create_product_type, product_type=product_type
+    )
 
 
 @router.get(
     "/", response_model=List[ProductTypeResponse], summary="Get all product types"
 )
-def read_product_types(
+async def read_product_types(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated response fields"),
     db: Session = Depends(get_db),
 ):
-    product_types = crud_product_type.get_product_types(db, skip=skip, limit=limit)
-    return product_types
+    field_set = parse_fields(fields, ProductTypeResponse)
+    not_modified, versions = await versioned_get(request, response, db, ("product_types",))
+    if not_modified:
+        return not_modified
+    product_types = await run_db(
+        db,
+        crud_product_type.get_product_types,
+        skip=skip,
+        limit=limit,
+        after=decode_cursor(after, (int,)),
+        fields=field_set,
+        version=versions.get("product_types"),
+    )
+    set_next_cursor(
+        response, product_types, limit, crud_product_type.product_type_cursor
+    )
+    if field_set is not None:
+        return fields_response(product_types, field_set, response)
+    return product_type_list_serializer.response(product_types, response)
 
 
 @router.get(
@@ -40,15 +69,27 @@ def read_product_types(
     response_model=ProductTypeResponse,
     summary="Get product type by ID",
 )
-def read_product_type(
+async def read_product_type(
     product_type_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated response fields"),
     db: Session = Depends(get_db),
 ):
-    db_product_type = crud_product_type.get_product_type(
-        db, product_type_id=product_type_id
+    field_set = parse_fields(fields, ProductTypeResponse)
+    not_modified, versions = await versioned_get(request, response, db, ("product_types",))
+    if not_modified:
+        return not_modified
+    db_product_type = await run_db(
+        db,
+        crud_product_type.get_product_type,
+        product_type_id=product_type_id,
+        version=versions.get("product_types"),
     )
     if db_product_type is None:
         raise HTTPException(status_code=404, detail="Product type not found")
+    if field_set is not None:
+        return fields_response(db_product_type, field_set, response)
     return db_product_type
 
 
@@ -57,14 +98,17 @@ def read_product_type(
     response_model=ProductTypeResponse,
     summary="Update product type",
 )
-def update_product_type(
+async def update_product_type(
     product_type_id: int,
     product_type: ProductTypeUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    db_product_type = crud_product_type.update_product_type(
-        db, product_type_id=product_type_id, product_type_update=product_type
+    db_product_type = await run_db(
+        db,
+        crud_product_type.update_product_type,
+        product_type_id=product_type_id,
+        product_type_update=product_type,
     )
     if db_product_type is None:
         raise HTTPException(status_code=404, detail="Product type not found")
@@ -72,13 +116,13 @@ def update_product_type(
 
 
 @router.delete("/{product_type_id}", summary="Delete product type")
-def delete_product_type(
+async def delete_product_type(
     product_type_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    db_product_type = crud_product_type.delete_product_type(
-        db, product_type_id=product_type_id
+    db_product_type = await run_db(
+        db, crud_product_type.delete_product_type, product_type_id=product_type_id
     )
     if db_product_type is None:
         raise HTTPException(status_code=404, detail="Product type not found")
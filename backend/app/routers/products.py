@@ -1,69 +1,406 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from starlette.concurrency import run_in_threadpool
+from typing import Iterable, List, Optional, Sequence
+from app.core.database import get_db, run_db
+from app.core.fields import fields_response, parse_fields
+from app.core.serialization import ListSerializer
 from app.core.auth import get_current_user
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
+from app.core.pagination import decode_cursor, set_next_cursor
+from app.core.versioning import versioned_get
+from app.core.images import (
+    IMAGE_CACHE_CONTROL,
+    IMAGE_REVALIDATE_CACHE_CONTROL,
+    image_version,
+    sniff_image_type,
+)
+from app.core.renditions import (
+    RENDITION_FORMATS,
+    RENDITION_SIZES,
+    rendition_name,
+    schedule_renditions,
+)
+from app.core.storage import get_blob_store
+from app.core.uploads import receive_image_upload
+from app.schemas.product import (
+    BulkResult,
+    ProductBulkCreate,
+    ProductBulkDelete,
+    ProductBulkUpdate,
+    ProductCreate,
+    ProductUpdate,
+    ProductResponse,
+)
 from app.crud import product as crud_product
-from app.models.user import User
+from app.schemas.user import UserResponse
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# Ключ сортировки: id, price или name, префикс "-" - по убыванию
+PRODUCT_SORT_PATTERN = "^-?(id|price|name)$"
+
+# Ограничение на число id в GET /products/?ids=...
+MAX_PRODUCT_IDS = 500
+MISSING_IDS_HEADER = "X-Missing-Ids"
+
+product_list_serializer = ListSerializer(ProductResponse)
+
+
+def _parse_ids(ids: str) -> List[int]:
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if len(parsed) > MAX_PRODUCT_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PRODUCT_IDS} ids per request")
+    return parsed
+
+
+# Статусы элементов пакета, изображения которых записаны в товары
+_IMAGE_WRITTEN_STATUSES = {"created", "updated"}
+
+
+# Запись blob-объектов и постановка уменьшенных копий в очередь - блокирующий
+# файловый ввод-вывод. Он выполняется в пуле потоков, а не внутри crud-функций:
+# в асинхронном режиме run_db выполняет их в цикле событий. Изображения, которые
+# перестали использоваться (замененные, удаленные, не записанные элементы пакета),
+# удаляет только collect-images - см. app.crud.product.collect_orphaned_images
+def _store_images(images: Sequence[Optional[bytes]]) -> List[Optional[str]]:
+    store = get_blob_store()
+    return [store.put(image) if image else None for image in images]
+
+
+def _schedule_renditions(image_hashes: Iterable[Optional[str]]):
+    for image_hash in set(image_hashes):
+        schedule_renditions(image_hash, retry_failed=True)
+
 
 @router.post("/", response_model=ProductResponse, summary="Create product")
-def create_product(
+async def create_product(
     product: ProductCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    image_hash = None
+    if product.image:
+        (image_hash,) = await run_in_threadpool(_store_images, [product.image])
+    db_product = await run_db(
+        db, crud_product.create_product, product=product, image_hash=image_hash
+    )
+    if image_hash:
+        await run_in_threadpool(schedule_renditions, image_hash, retry_failed=True)
+    return db_product
+
+
+def _bulk_response(result: BulkResult, atomic: bool) -> BulkResult:
+    if atomic and result.failed:
+        raise HTTPException(status_code=422, detail=result.model_dump())
+    return result
+
+
+async def _schedule_bulk_renditions(result: BulkResult, image_hashes: Sequence[Optional[str]]):
+    written = [
+        image_hash
+        for item, image_hash in zip(result.results, image_hashes)
+        if image_hash and item.status in _IMAGE_WRITTEN_STATUSES
+    ]
+    if written:
+        await run_in_threadpool(_schedule_renditions, written)
+
+
+# Массовые операции: одна транзакция и один сброс кешей каталога на весь пакет.
+# По умолчанию ошибочные элементы пропускаются, остальные записываются;
+# с atomic=true при любой ошибке не записывается ничего (ответ 422)
+@router.post("/bulk", response_model=BulkResult, summary="Create products in bulk")
+async def bulk_create_products(
+    payload: ProductBulkCreate,
+    atomic: bool = False,
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    image_hashes = await run_in_threadpool(_store_images, [item.image for item in payload.items])
+    result = await run_db(
+        db,
+        crud_product.bulk_create_products,
+        items=payload.items,
+        image_hashes=image_hashes,
+        atomic=atomic,
+    )
+    await _schedule_bulk_renditions(result, image_hashes)
+    return _bulk_response(result, atomic)
+
+
+@router.patch("/bulk", response_model=BulkResult, summary="Update products in bulk")
+async def bulk_update_products(
+    payload: ProductBulkUpdate,
+    atomic: bool = False,
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    image_hashes = await run_in_threadpool(_store_images, [item.image for item in payload.items])
+    result = await run_db(
+        db,
+        crud_product.bulk_update_products,
+        items=payload.items,
+        image_hashes=image_hashes,
+        atomic=atomic,
+    )
+    await _schedule_bulk_renditions(result, image_hashes)
+    return _bulk_response(result, atomic)
+
+
+@router.post("/bulk/delete", response_model=BulkResult, summary="Delete products in bulk")
+async def bulk_delete_products(
+    payload: ProductBulkDelete,
+    atomic: bool = False,
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    return crud_product.create_product(db=db, product=product)
+    result = await run_db(
+        db, crud_product.bulk_delete_products, ids=payload.ids, atomic=atomic
+    )
+    return _bulk_response(result, atomic)
 
 
 @router.get("/", response_model=List[ProductResponse], summary="Get all products")
-def read_products(
+async def read_products(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    product_type_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    name: Optional[str] = None,
+    sort: str = Query("id", pattern=PRODUCT_SORT_PATTERN),
+    ids: Optional[str] = Query(None, description="Comma-separated product ids"),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields"),
     db: Session = Depends(get_db),
 ):
-    products = crud_product.get_products(db, skip=skip, limit=limit)
-    return products
+    """
+    С параметром ids возвращает товары с этими id в порядке запроса (остальные
+    фильтры и пагинация не применяются); отсутствующие id перечисляются в X-Missing-Ids.
+    С параметром fields ответ содержит только перечисленные поля.
+    """
+    field_set = parse_fields(fields, ProductResponse)
+    not_modified, versions = await versioned_get(request, response, db, ("products",))
+    if not_modified:
+        return not_modified
+    if ids is not None:
+        products, missing = await run_db(
+            db,
+            crud_product.get_products_by_ids,
+            ids=_parse_ids(ids),
+            version=versions.get("products"),
+        )
+        if missing:
+            response.headers[MISSING_IDS_HEADER] = ",".join(map(str, missing))
+        if field_set is not None:
+            return fields_response(products, field_set, response)
+        return product_list_serializer.response(products, response)
+    products = await run_db(
+        db,
+        crud_product.get_products,
+        skip=skip,
+        limit=limit,
+        after=decode_cursor(after, crud_product.product_cursor_kinds(sort)),
+        product_type_id=product_type_id,
+        min_price=min_price,
+        max_price=max_price,
+        name=name,
+        sort=sort,
+        fields=field_set,
+        version=versions.get("products"),
+    )
+    set_next_cursor(
+        response, products, limit, lambda p: crud_product.product_cursor(p, sort)
+    )
+    if field_set is not None:
+        return fields_response(products, field_set, response)
+    return product_list_serializer.response(products, response)
 
 
 @router.get(
     "/{product_id}", response_model=ProductResponse, summary="Get product by ID"
 )
-def read_product(
+async def read_product(
     product_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated response fields"),
     db: Session = Depends(get_db),
 ):
-    db_product = crud_product.get_product(db, product_id=product_id)
+    field_set = parse_fields(fields, ProductResponse)
+    not_modified, versions = await versioned_get(request, response, db, ("products",))
+    if not_modified:
+        return not_modified
+    db_product = await run_db(
+        db, crud_product.get_product, product_id=product_id, version=versions.get("products")
+    )
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
+    if field_set is not None:
+        # Товар читается из кеша целиком, отбрасываются только лишние поля
+        return fields_response(db_product, field_set, response)
     return db_product
 
 
+def _file_response(path, open_stream, media_type, headers):
+    if path is not None:
+        # FileResponse отдает файл через sendfile, если сервер это поддерживает
+        return FileResponse(path, media_type=media_type, headers=headers)
+    return StreamingResponse(open_stream(), media_type=media_type, headers=headers)
+
+
+def _image_response(
+    request: Request,
+    image_hash: str,
+    v: Optional[str],
+    size: Optional[str],
+    format: Optional[str],
+) -> Response:
+    store = get_blob_store()
+    if not store.exists(image_hash):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    cache_control = (
+        IMAGE_CACHE_CONTROL
+        if v == image_version(image_hash)
+        else IMAGE_REVALIDATE_CACHE_CONTROL
+    )
+
+    if size is not None:
+        headers = {}
+        if format is None:
+            # Формат выбирается по заголовку Accept, поэтому кеши должны его учитывать
+            format = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+            headers["Vary"] = "Accept"
+        name = rendition_name(size, format)
+        if store.has_rendition(image_hash, name):
+            etag = f'"{image_hash}-{name}"'
+            headers.update({"ETag": etag, "Cache-Control": cache_control})
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers=headers)
+            return _file_response(
+                store.rendition_path(image_hash, name),
+                lambda: store.open_rendition(image_hash, name),
+                RENDITION_FORMATS[format][1],
+                headers,
+            )
+        # Копия еще не готова: ставим ее в очередь и временно отдаем оригинал,
+        # не разрешая клиенту кешировать его под этим URL
+        schedule_renditions(image_hash)
+        cache_control = IMAGE_REVALIDATE_CACHE_CONTROL
+
+    etag = f'"{image_hash}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    with store.open(image_hash) as f:
+        media_type = sniff_image_type(f.read(16)) or "application/octet-stream"
+
+    return _file_response(
+        store.path(image_hash), lambda: store.open(image_hash), media_type, headers
+    )
+
+
+@router.get("/{product_id}/image", summary="Get product image")
+async def read_product_image(
+    product_id: int,
+    request: Request,
+    v: Optional[str] = None,
+    size: Optional[str] = None,
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    if size is not None and size not in RENDITION_SIZES:
+        raise HTTPException(status_code=400, detail="Unknown image size")
+    if format is not None and format not in RENDITION_FORMATS:
+        raise HTTPException(status_code=400, detail="Unknown image format")
+
+    image_hash = await run_db(
+        db, crud_product.get_product_image_hash, product_id=product_id
+    )
+    if image_hash is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    # Обращения к хранилищу - блокирующий файловый ввод-вывод
+    return await run_in_threadpool(_image_response, request, image_hash, v, size, format)
+
+
 @router.put("/{product_id}", response_model=ProductResponse, summary="Update product")
-def update_product(
+async def update_product(
     product_id: int,
     product: ProductUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    image_hash = None
+    if product.image is not None:
+        (image_hash,) = await run_in_threadpool(_store_images, [product.image])
+    db_product = await run_db(
+        db,
+        crud_product.update_product,
+        product_id=product_id,
+        product_update=product,
+        image_hash=image_hash,
+    )
+    if db_product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if image_hash:
+        await run_in_threadpool(schedule_renditions, image_hash, retry_failed=True)
+    return db_product
+
+
+@router.put(
+    "/{product_id}/image",
+    response_model=ProductResponse,
+    summary="Upload product image",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["image"],
+                        "properties": {"image": {"type": "string", "format": "binary"}},
+                    }
+                }
+            },
+        }
+    },
+)
+async def upload_product_image(
+    product_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    db_product = crud_product.update_product(
-        db, product_id=product_id, product_update=product
+    """Загрузка изображения файлом (multipart/form-data, поле image) без base64"""
+    upload = await receive_image_upload(request)
+    try:
+        image_hash = await run_in_threadpool(get_blob_store().put_stream, upload.file)
+    finally:
+        upload.close()
+    db_product = await run_db(
+        db, crud_product.set_product_image, product_id=product_id, image_hash=image_hash
     )
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
+    await run_in_threadpool(schedule_renditions, image_hash, retry_failed=True)
     return db_product
 
 
 @router.delete("/{product_id}", summary="Delete product")
-def delete_product(
+async def delete_product(
     product_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    db_product = crud_product.delete_product(db, product_id=product_id)
+    db_product = await run_db(db, crud_product.delete_product, product_id=product_id)
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     return {"message": "Product deleted successfully"}
@@ -1,66 +1,115 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from typing import List, Optional
+from app.core.database import get_db, run_db
+from app.core.fields import fields_response, parse_fields
+from app.core.serialization import ListSerializer
+from app.core.pagination import decode_cursor, set_next_cursor
+from app.core.versioning import conditional_get, etag_matches
 from app.core.auth import get_current_user
-from app.schemas.review import ReviewCreate, ReviewResponse
+from app.schemas.review import ReviewCreate, ReviewResponse, ReviewStatsResponse
 from app.crud import review as crud_review
-from app.models.user import User
+from app.schemas.user import UserResponse
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
+# Ответы с отзывами содержат логин автора, поэтому зависят и от таблицы users
+REVIEW_TABLES = ("reviews", "users")
+
+review_list_serializer = ListSerializer(ReviewResponse)
+
 
 @router.get("/latest", response_model=List[ReviewResponse], summary="Get latest reviews")
-def read_latest_reviews(
+async def read_latest_reviews(
+    request: Request,
     db: Session = Depends(get_db),
 ):
     """Получить последние 5 отзывов для слайдера на главной странице"""
-    reviews = crud_review.get_reviews(db, skip=0, limit=5)
-    result = []
-    for review in reviews:
-        response = ReviewResponse.model_validate(review)
-        response.user_login = review.user.login if review.user else None
-        result.append(response)
-    return result
+    latest = crud_review.latest_reviews.get()
+    if latest is None:
+        latest = await run_db(db, crud_review.load_latest_reviews)
+    body, etag = latest
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/stats", response_model=ReviewStatsResponse, summary="Get review rating statistics")
+async def read_review_stats(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    """Число отзывов, средняя оценка и распределение оценок (из сводной строки, O(1))"""
+    not_modified = await conditional_get(request, response, db, ("reviews",))
+    if not_modified:
+        return not_modified
+    return await run_db(db, crud_review.get_review_stats)
 
 
 @router.post("/", response_model=ReviewResponse, summary="Create review")
-def create_review(
+async def create_review(
     review: ReviewCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    db_review = crud_review.create_review(db=db, review=review, user_id=current_user.id)
-    # Добавляем логин пользователя в ответ
-    response = ReviewResponse.model_validate(db_review)
-    response.user_login = current_user.login
-    return response
+    return await run_db(
+        db,
+        crud_review.create_review,
+        review=review,
+        user_id=current_user.id,
+        user_login=current_user.login,
+    )
 
 
 @router.get("/", response_model=List[ReviewResponse], summary="Get all reviews")
-def read_reviews(
+async def read_reviews(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated response fields"),
     db: Session = Depends(get_db),
 ):
-    reviews = crud_review.get_reviews(db, skip=skip, limit=limit)
-    # Добавляем логины пользователей
-    result = []
-    for review in reviews:
-        response = ReviewResponse.model_validate(review)
-        response.user_login = review.user.login if review.user else None
-        result.append(response)
-    return result
+    field_set = parse_fields(fields, ReviewResponse)
+    not_modified = await conditional_get(request, response, db, REVIEW_TABLES)
+    if not_modified:
+        return not_modified
+    reviews = await run_db(
+        db,
+        crud_review.get_reviews,
+        skip=skip,
+        limit=limit,
+        after=decode_cursor(after, (datetime, int)),
+        fields=field_set,
+    )
+    set_next_cursor(response, reviews, limit, crud_review.review_cursor)
+    if field_set is not None:
+        return fields_response(reviews, field_set, response)
+    # Логины авторов берутся из связи user, загруженной joinedload
+    return review_list_serializer.response(reviews, response)
 
 
 @router.get("/{review_id}", response_model=ReviewResponse, summary="Get review by ID")
-def read_review(
+async def read_review(
     review_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated response fields"),
     db: Session = Depends(get_db),
 ):
-    db_review = crud_review.get_review(db, review_id=review_id)
+    field_set = parse_fields(fields, ReviewResponse)
+    not_modified = await conditional_get(request, response, db, REVIEW_TABLES)
+    if not_modified:
+        return not_modified
+    db_review = await run_db(
+        db, crud_review.get_review, review_id=review_id, fields=field_set
+    )
     if db_review is None:
         raise HTTPException(status_code=404, detail="Review not found")
-    response = ReviewResponse.model_validate(db_review)
-    response.user_login = db_review.user.login if db_review.user else None
-    return response
+    if field_set is not None:
+        return fields_response(db_review, field_set, response)
+    return db_review
@@ -1,65 +1,98 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
+from typing import List, Optional
+from app.core.database import get_db, run_db
+from app.core.fields import fields_response, parse_fields
+from app.core.serialization import ListSerializer
+from app.core.pagination import decode_cursor, set_next_cursor
 from app.core.auth import get_current_user
+from app.core.security import get_password_hash_async
 from app.schemas.user import UserCreate, UserResponse
 from app.crud import user as crud_user
-from app.models.user import User
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+user_list_serializer = ListSerializer(UserResponse)
+
 
 @router.get("/me", response_model=UserResponse, summary="Get current user")
-def read_current_user(
-    current_user: User = Depends(get_current_user),
+async def read_current_user(
+    current_user: UserResponse = Depends(get_current_user),
 ):
     return current_user
 
 
 @router.get("/", response_model=List[UserResponse], summary="Get all users")
-def read_users(
+async def read_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated response fields"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    users = crud_user.get_users(db, skip=skip, limit=limit)
-    return users
+    field_set = parse_fields(fields, UserResponse)
+    users = await run_db(
+        db,
+        crud_user.get_users,
+        skip=skip,
+        limit=limit,
+        after=decode_cursor(after, (int,)),
+        fields=field_set,
+    )
+    set_next_cursor(response, users, limit, crud_user.user_cursor)
+    if field_set is not None:
+        return fields_response(users, field_set, response)
+    return user_list_serializer.response(users, response)
 
 
 @router.get("/{user_id}", response_model=UserResponse, summary="Get user by ID")
-def read_user(
+async def read_user(
     user_id: int,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated response fields"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    db_user = crud_user.get_user(db, user_id=user_id)
+    field_set = parse_fields(fields, UserResponse)
+    db_user = await run_db(db, crud_user.get_user, user_id=user_id, fields=field_set)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
+    if field_set is not None:
+        return fields_response(db_user, field_set, response)
     return db_user
 
 
 @router.put("/{user_id}", response_model=UserResponse, summary="Update user")
-def update_user(
+async def update_user(
     user_id: int,
     user: UserCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    db_user = crud_user.update_user(db, user_id=user_id, user_update=user)
+    hashed_password = (
+        await get_password_hash_async(user.password) if user.password else None
+    )
+    db_user = await run_db(
+        db,
+        crud_user.update_user,
+        user_id=user_id,
+        user_update=user,
+        hashed_password=hashed_password,
+    )
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
 
 @router.delete("/{user_id}", summary="Delete user")
-def delete_user(
+async def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
 ):
-    db_user = crud_user.delete_user(db, user_id=user_id)
+    db_user = await run_db(db, crud_user.delete_user, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User deleted successfully"}
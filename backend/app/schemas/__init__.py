@@ -1,4 +1,4 @@
-from .user import UserCreate, UserResponse, UserLogin, Token
+from .user import UserCreate, UserResponse, UserLogin, Token, RefreshTokenRequest
 from .product_type import ProductTypeCreate, ProductTypeUpdate, ProductTypeResponse
 from .product import ProductCreate, ProductUpdate, ProductResponse
 
@@ -7,6 +7,7 @@ __all__ = [
     "UserResponse",
     "UserLogin",
     "Token",
+    "RefreshTokenRequest",
     "ProductTypeCreate",
     "ProductTypeUpdate",
     "ProductTypeResponse",
@@ -1,6 +1,8 @@
-from pydantic import BaseModel, field_serializer, model_serializer, field_validator, model_validator
-from typing import Optional, Union
+from pydantic import BaseModel, Field, computed_field, model_validator
+from typing import List, Optional, Union
 import base64
+from app.core.config import settings
+from app.core.images import image_version
 
 
 class ProductCreate(BaseModel):
@@ -49,18 +51,48 @@ class ProductResponse(BaseModel):
     name: str
     description: Optional[str]
     price: float
-    image: Optional[bytes] = None
-
-    @model_serializer
-    def ser_model(self):
-        return {
-            'id': self.id,
-            'product_type_id': self.product_type_id,
-            'name': self.name,
-            'description': self.description,
-            'price': self.price,
-            'image': base64.b64encode(self.image).decode('utf-8') if self.image else None
-        }
+    image_hash: Optional[str] = Field(default=None, exclude=True)
+
+    @computed_field
+    @property
+    def image_url(self) -> Optional[str]:
+        # Само изображение отдается отдельным эндпоинтом GET /products/{id}/image,
+        # хеш в URL позволяет кешировать его бессрочно
+        if not self.image_hash:
+            return None
+        return f"/products/{self.id}/image?v={image_version(self.image_hash)}"
 
     class Config:
         from_attributes = True
+
+
+class ProductBulkCreate(BaseModel):
+    items: List[ProductCreate] = Field(min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+
+class ProductBulkUpdateItem(ProductUpdate):
+    id: int
+
+
+class ProductBulkUpdate(BaseModel):
+    items: List[ProductBulkUpdateItem] = Field(min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+
+class ProductBulkDelete(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+
+class BulkItemResult(BaseModel):
+    # Позиция элемента в запросе
+    index: int
+    id: Optional[int] = None
+    # created, updated, deleted, not_found, invalid; skipped - не записан из-за ошибок
+    # в других элементах (atomic)
+    status: str
+    error: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    applied: int
+    failed: int
+    results: List[BulkItemResult]
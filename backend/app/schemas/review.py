@@ -1,6 +1,6 @@
-from pydantic import BaseModel, field_validator
+from pydantic import AliasChoices, AliasPath, BaseModel, Field, field_validator
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 
 class ReviewCreate(BaseModel):
@@ -30,7 +30,17 @@ class ReviewResponse(BaseModel):
     rating: int
     text: str
     created_at: datetime
-    user_login: Optional[str] = None
+    # Из ORM-объекта Review логин берется из загруженной связи user
+    user_login: Optional[str] = Field(
+        default=None, validation_alias=AliasChoices("user_login", AliasPath("user", "login"))
+    )
 
     class Config:
         from_attributes = True
+
+
+class ReviewStatsResponse(BaseModel):
+    count: int
+    average: Optional[float] = None
+    # Число отзывов по оценкам: {1: ..., 5: ...}
+    histogram: Dict[int, int]
@@ -0,0 +1,221 @@
+"""
+Нагрузочные замеры API: пропускная способность и задержки p50/p95/p99 по сценариям
+с заданной конкурентностью и сравнение с сохраненным базовым прогоном.
+
+Запуск (из каталога backend, база заполнена командой python -m app.cli seed-demo
+и, для реалистичного объема, python -m app.cli seed):
+    python -m benchmarks.run                                   # приложение в этом процессе
+    python -m benchmarks.run --base-url http://localhost:8000  # запущенный сервер
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --tolerance 0.2
+
+При сравнении с базовым прогоном код возврата 1 означает регрессию: p95 вырос
+или пропускная способность упала больше чем на tolerance.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+import httpx
+from benchmarks.scenarios import SCENARIOS, Context, Scenario
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def _run_scenario(
+    client: httpx.AsyncClient,
+    ctx: Context,
+    scenario: Scenario,
+    concurrency: int,
+    requests: int,
+    duration: Optional[float],
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        nonlocal remaining, errors
+        while True:
+            if deadline is not None:
+                if time.perf_counter() >= deadline:
+                    return
+            elif remaining <= 0:
+                return
+            else:
+                remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await scenario(client, ctx)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+async def _prepare_context(client: httpx.AsyncClient, login: str, password: str) -> Context:
+    response = await client.post("/auth/login", json={"login": login, "password": password})
+    response.raise_for_status()
+    token = response.json()["access_token"]
+
+    products = (await client.get("/products/", params={"limit": 1000})).json()
+    product_types = (await client.get("/product_types/")).json()
+    if not products or not product_types:
+        raise SystemExit("The database is empty: run python -m app.cli seed-demo first")
+
+    return Context(
+        auth_headers={"Authorization": f"Bearer {token}"},
+        product_ids=[product["id"] for product in products],
+        product_type_ids=[product_type["id"] for product_type in product_types],
+        login=login,
+        password=password,
+    )
+
+
+async def run_benchmarks(args) -> Dict:
+    app = None
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        # Приложение в этом процессе: без сети, но с теми же настройками (.env, переменные окружения)
+        from app.main import app
+
+        await app.router.startup()
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=60
+        )
+
+    results = {}
+    try:
+        ctx = await _prepare_context(client, args.login, args.password)
+        for name in args.scenario or SCENARIOS:
+            scenario = SCENARIOS[name]
+            if args.warmup:
+                await _run_scenario(client, ctx, scenario, args.concurrency, args.warmup, None)
+            results[name] = await _run_scenario(
+                client, ctx, scenario, args.concurrency, args.requests, args.duration
+            )
+            _print_row(name, results[name])
+    finally:
+        await client.aclose()
+        if app is not None:
+            await app.router.shutdown()
+
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "target": args.base_url or "in-process",
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "duration": args.duration,
+            "python": platform.python_version(),
+        },
+        "scenarios": results,
+    }
+
+
+def _print_header():
+    print(
+        f"{'scenario':<26}{'requests':>9}{'errors':>8}{'rps':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+
+
+def _print_row(name: str, result: Dict[str, float]):
+    print(
+        f"{name:<26}{result['requests']:>9}{result['errors']:>8}{result['rps']:>10.1f}"
+        f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+    )
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Список регрессий относительно базового прогона."""
+    regressions = []
+    print(f"\n{'scenario':<26}{'p95 base':>10}{'p95 now':>10}{'rps base':>10}{'rps now':>10}")
+    for name, current in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        print(
+            f"{name:<26}{base['p95_ms']:>10.2f}{current['p95_ms']:>10.2f}"
+            f"{base['rps']:>10.1f}{current['rps']:>10.1f}"
+        )
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {base['p95_ms']:.2f} ms -> {current['p95_ms']:.2f} ms"
+            )
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']:.1f} -> {current['rps']:.1f}")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {current['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API endpoints")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--duration", type=float, help="seconds per scenario (overrides --requests)")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per scenario")
+    parser.add_argument(
+        "--scenario", action="append", choices=sorted(SCENARIOS), help="run only these scenarios"
+    )
+    parser.add_argument("--login", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--save-baseline", help="write results as the new baseline")
+    parser.add_argument("--baseline", help="compare with this baseline")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed relative p95/rps change"
+    )
+    args = parser.parse_args()
+
+    _print_header()
+    results = asyncio.run(run_benchmarks(args))
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
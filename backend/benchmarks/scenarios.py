@@ -0,0 +1,112 @@
+"""
+Сценарии нагрузки: один сценарий - один тип запроса к API.
+
+Каждый сценарий - асинхронная функция (client, ctx) -> httpx.Response.
+ctx хранит общие для прогона данные: заголовок авторизации, id существующих
+товаров и типов, генератор случайных чисел.
+"""
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List
+import httpx
+
+
+@dataclass
+class Context:
+    auth_headers: Dict[str, str]
+    product_ids: List[int]
+    product_type_ids: List[int]
+    login: str
+    password: str
+    rng: random.Random = field(default_factory=lambda: random.Random(0))
+
+
+Scenario = Callable[[httpx.AsyncClient, Context], Awaitable[httpx.Response]]
+
+
+async def list_products(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get("/products/", params={"limit": 50})
+
+
+async def list_products_filtered(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get(
+        "/products/",
+        params={
+            "limit": 50,
+            "product_type_id": ctx.rng.choice(ctx.product_type_ids),
+            "sort": "-price",
+        },
+    )
+
+
+async def search_products(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get("/products/", params={"limit": 20, "name": ctx.rng.choice(["Кольцо", "Мечта", "Арт"])})
+
+
+async def get_product(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get(f"/products/{ctx.rng.choice(ctx.product_ids)}")
+
+
+async def list_product_types(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get("/product_types/")
+
+
+async def latest_reviews(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get("/reviews/latest")
+
+
+async def list_reviews(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get("/reviews/", params={"limit": 50})
+
+
+async def current_user(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get("/users/me", headers=ctx.auth_headers)
+
+
+async def login(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.post("/auth/login", json={"login": ctx.login, "password": ctx.password})
+
+
+async def create_update_delete_product(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    """Полный цикл записи: создание, изменение и удаление товара (три запроса)."""
+    response = await client.post(
+        "/products/",
+        json={
+            "name": f"Benchmark {ctx.rng.random()}",
+            "price": round(ctx.rng.uniform(100, 1000), 2),
+            "product_type_id": ctx.rng.choice(ctx.product_type_ids),
+        },
+        headers=ctx.auth_headers,
+    )
+    if response.status_code != 200:
+        return response
+    product_id = response.json()["id"]
+    response = await client.put(
+        f"/products/{product_id}", json={"price": 1.0}, headers=ctx.auth_headers
+    )
+    if response.status_code != 200:
+        return response
+    return await client.delete(f"/products/{product_id}", headers=ctx.auth_headers)
+
+
+async def create_review(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.post(
+        "/reviews/",
+        json={"rating": ctx.rng.randint(1, 5), "text": "Benchmark review"},
+        headers=ctx.auth_headers,
+    )
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "products.list": list_products,
+    "products.list_filtered": list_products_filtered,
+    "products.search": search_products,
+    "products.get": get_product,
+    "product_types.list": list_product_types,
+    "reviews.latest": latest_reviews,
+    "reviews.list": list_reviews,
+    "users.me": current_user,
+    "auth.login": login,
+    "products.write_cycle": create_update_delete_product,
+    "reviews.create": create_review,
+}
@@ -0,0 +1,120 @@
+"""
+Стоимость сериализации ответов-списков: время на 1000 строк для прежнего пути
+FastAPI (response_model: проверка списка, преобразование в dict'ы, json.dumps)
+и для app.core.serialization (один вызов TypeAdapter, кодирование в pydantic-core).
+База данных не нужна: строки создаются в памяти.
+
+Запуск (из каталога backend):
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --rows 5000 --repeat 20
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.core.serialization import ListSerializer
+from app.models.review import Review
+from app.models.user import User
+from app.schemas.product import ProductResponse
+from app.schemas.review import ReviewResponse
+
+
+def _products(rows: int, rng: random.Random) -> List[ProductResponse]:
+    # Снимки из кеша каталога - то, что возвращает crud.get_products
+    return [
+        ProductResponse(
+            id=i,
+            product_type_id=rng.randrange(1, 20),
+            name=f"Кольцо №{i}",
+            description="Золотое кольцо с изумрудом и бриллиантовой дорожкой",
+            price=round(rng.uniform(1_000, 500_000), 2),
+            image_hash=f"{rng.getrandbits(256):064x}",
+        )
+        for i in range(rows)
+    ]
+
+
+def _reviews(rows: int, rng: random.Random) -> List[Review]:
+    # ORM-объекты с загруженной связью user - то, что возвращает crud.get_reviews
+    users = [User(id=i, login=f"user{i}") for i in range(50)]
+    now = datetime(2026, 1, 1)
+    reviews = []
+    for i in range(rows):
+        user = rng.choice(users)
+        reviews.append(
+            Review(
+                id=i,
+                user_id=user.id,
+                user=user,
+                rating=rng.randrange(1, 6),
+                text="Отличное качество, доставили быстро, все как на фото",
+                created_at=now - timedelta(minutes=i),
+            )
+        )
+    return reviews
+
+
+_loop = asyncio.new_event_loop()
+
+
+def _fastapi_path(schema, response_class) -> Callable[[list], bytes]:
+    field = create_response_field(name="response", type_=List[schema], mode="serialization")
+
+    def serialize(items):
+        content = _loop.run_until_complete(
+            serialize_response(field=field, response_content=items)
+        )
+        return response_class(content).body
+
+    return serialize
+
+
+def _per_row_path(schema) -> Callable[[list], bytes]:
+    # Прежний /reviews/: model_validate в цикле, затем обычный путь FastAPI
+    fastapi_path = _fastapi_path(schema, JSONResponse)
+    return lambda items: fastapi_path([schema.model_validate(item) for item in items])
+
+
+def _measure(fn: Callable[[list], bytes], items: list, repeat: int) -> float:
+    fn(items)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(items)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure list serialization cost")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    datasets = {
+        "products": (ProductResponse, _products(args.rows, rng)),
+        "reviews": (ReviewResponse, _reviews(args.rows, rng)),
+    }
+
+    print(f"{'dataset':<10}{'path':<28}{'ms per 1k rows':>16}{'speedup':>10}")
+    for name, (schema, items) in datasets.items():
+        paths = {}
+        if name == "reviews":
+            paths["per-row model_validate"] = _per_row_path(schema)
+        paths["fastapi + json"] = _fastapi_path(schema, JSONResponse)
+        paths["fastapi + orjson"] = _fastapi_path(schema, ORJSONResponse)
+        paths["ListSerializer"] = ListSerializer(schema).dump_json
+
+        baseline = None
+        for path, fn in paths.items():
+            per_1k = _measure(fn, items, args.repeat) / args.rows * 1000 * 1000
+            baseline = baseline or per_1k
+            print(f"{name:<10}{path:<28}{per_1k:>16.2f}{baseline / per_1k:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Исходная схема (до хранилища изображений)
+
+Базы, созданные через Base.metadata.create_all до появления миграций,
+помечаются этой ревизией: alembic stamp 0001
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("login", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("is_superuser", sa.Boolean(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_login", "users", ["login"], unique=True)
+
+    op.create_table(
+        "product_types",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False, unique=True),
+    )
+    op.create_index("ix_product_types_id", "product_types", ["id"])
+
+    op.create_table(
+        "products",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "product_type_id", sa.Integer(), sa.ForeignKey("product_types.id"), nullable=False
+        ),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String()),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("image", sa.LargeBinary()),
+    )
+    op.create_index("ix_products_id", "products", ["id"])
+
+    op.create_table(
+        "reviews",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("rating", sa.Integer(), nullable=False),
+        sa.Column("text", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_reviews_id", "reviews", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("reviews")
+    op.drop_table("products")
+    op.drop_table("product_types")
+    op.drop_table("users")
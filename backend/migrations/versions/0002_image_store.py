@@ -0,0 +1,61 @@
+"""Изображения товаров в хранилище blob-объектов
+
+Содержимое products.image переносится в хранилище (app.core.storage),
+в строке товара остается sha256 в image_hash, колонка image удаляется.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.core.storage import get_blob_store
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 100
+
+
+def upgrade() -> None:
+    op.add_column("products", sa.Column("image_hash", sa.String(length=64)))
+    op.create_index("ix_products_image_hash", "products", ["image_hash"])
+
+    bind = op.get_bind()
+    store = get_blob_store()
+    last_id = 0
+    while True:
+        ids = bind.execute(
+            sa.text(
+                "SELECT id FROM products WHERE id > :last_id AND image IS NOT NULL "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).scalars().all()
+        if not ids:
+            break
+        for product_id in ids:
+            # По одному изображению за раз, чтобы не держать всю партию в памяти
+            image = bind.execute(
+                sa.text("SELECT image FROM products WHERE id = :id"), {"id": product_id}
+            ).scalar()
+            bind.execute(
+                sa.text("UPDATE products SET image_hash = :hash WHERE id = :id"),
+                {"hash": store.put(bytes(image)), "id": product_id},
+            )
+        last_id = ids[-1]
+
+    with op.batch_alter_table("products") as batch:
+        batch.drop_column("image")
+
+
+def downgrade() -> None:
+    # Содержимое изображений в колонку не возвращается: оно остается в хранилище
+    with op.batch_alter_table("products") as batch:
+        batch.add_column(sa.Column("image", sa.LargeBinary()))
+    op.drop_index("ix_products_image_hash", table_name="products")
+    with op.batch_alter_table("products") as batch:
+        batch.drop_column("image_hash")
@@ -0,0 +1,47 @@
+"""Индексы под запросы каталога и отзывов
+
+- products.product_type_id, products.price, products.name: фильтр по типу
+  и сортировка/курсорная пагинация списка товаров
+- reviews (created_at, id): лента отзывов, новые сначала, и ее курсор
+- reviews.user_id: внешний ключ (выборки по автору, удаление пользователя)
+
+На PostgreSQL индексы строятся CONCURRENTLY, не блокируя запись в таблицы.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_products_product_type_id", "products", ["product_type_id"]),
+    ("ix_products_price", "products", ["price"]),
+    ("ix_products_name", "products", ["name"]),
+    ("ix_reviews_created_at_id", "reviews", ["created_at", "id"]),
+    ("ix_reviews_user_id", "reviews", ["user_id"]),
+]
+
+
+def upgrade() -> None:
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    if concurrently:
+        # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(
+                    name, table, columns, postgresql_concurrently=True, if_not_exists=True
+                )
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
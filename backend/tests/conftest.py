@@ -0,0 +1,77 @@
+"""
+Общие фикстуры тестов.
+
+Тесты работают с временной базой SQLite: схема создается миграциями, данные -
+так же, как командой seed-demo. Переменные окружения задаются до импорта
+приложения, потому что настройки читаются при импорте app.core.config.
+
+Запуск (из каталога backend):
+    python -m pytest
+    DATABASE_ASYNC=true python -m pytest
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+_TMP_DIR = tempfile.mkdtemp(prefix="products-api-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/test.db"
+os.environ["MEDIA_ROOT"] = os.path.join(_TMP_DIR, "media")
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _migrate():
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    command.upgrade(config, "head")
+
+
+def _seed_demo():
+    from app.core.database import SessionLocal
+    from app.core.init_data import create_test_data
+    from app.core.versioning import ensure_versions
+    from app.crud.review import ensure_review_stats
+
+    db = SessionLocal()
+    try:
+        ensure_versions(db)
+        create_test_data(db)
+        ensure_review_stats(db)
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="session")
+def client():
+    _migrate()
+    _seed_demo()
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+    shutil.rmtree(_TMP_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def login(client):
+    """Вход пользователем; возвращает пару токенов."""
+
+    def _login(user_login: str = "admin", password: str = "admin") -> dict:
+        response = client.post("/auth/login", json={"login": user_login, "password": password})
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return _login
+
+
+@pytest.fixture(scope="session")
+def auth_headers(login):
+    return {"Authorization": f"Bearer {login()['access_token']}"}
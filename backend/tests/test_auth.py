@@ -0,0 +1,29 @@
+"""Ротация refresh-токенов."""
+
+
+def _refresh(client, refresh_token):
+    return client.post("/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def test_refresh_rotates_token(client, login):
+    first = login()["refresh_token"]
+    response = _refresh(client, first)
+    assert response.status_code == 200
+    second = response.json()["refresh_token"]
+    assert second != first
+    assert _refresh(client, second).status_code == 200
+
+
+def test_reused_refresh_token_revokes_family(client, login):
+    original = login()["refresh_token"]
+    response = _refresh(client, original)
+    assert response.status_code == 200
+    replacement = response.json()["refresh_token"]
+
+    # Повторное предъявление замененного токена - признак утечки: отказ
+    # и отзыв всей цепочки, в том числе выданного взамен токена
+    assert _refresh(client, original).status_code == 401
+    assert _refresh(client, replacement).status_code == 401
+
+    # Другие сессии пользователя не затрагиваются
+    assert _refresh(client, login()["refresh_token"]).status_code == 200
@@ -0,0 +1,70 @@
+"""Массовые операции с товарами."""
+import base64
+from app.core.database import SessionLocal
+from app.core.storage import get_blob_store
+from app.crud.product import collect_orphaned_images
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+
+
+def _image(payload: bytes) -> str:
+    return base64.b64encode(PNG_HEADER + payload).decode()
+
+
+def _product_ids(client):
+    return [product["id"] for product in client.get("/products/", params={"limit": 1000}).json()]
+
+
+def test_atomic_bulk_create_with_invalid_item_writes_nothing(client, auth_headers):
+    products_before = _product_ids(client)
+    blobs_before = set(get_blob_store().iter_digests())
+
+    response = client.post(
+        "/products/bulk",
+        params={"atomic": "true"},
+        json={
+            "items": [
+                {"product_type_id": 1, "name": "Валидный", "price": 10, "image": _image(b"a")},
+                {"product_type_id": 999999, "name": "Без типа", "price": 20},
+                {"product_type_id": 1, "name": "Валидный 2", "price": 30, "image": _image(b"b")},
+            ]
+        },
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 422
+    result = response.json()["detail"]
+    assert result["applied"] == 0
+    assert [item["status"] for item in result["results"]] == ["skipped", "invalid", "skipped"]
+    assert _product_ids(client) == products_before
+    # Изображения, сохраненные до проверки пакета, остаются до сборки мусора:
+    # свежие файлы она не трогает, остальные неиспользуемые удаляет
+    assert len(set(get_blob_store().iter_digests()) - blobs_before) == 2
+    db = SessionLocal()
+    try:
+        assert collect_orphaned_images(db) == 0
+        assert collect_orphaned_images(db, grace_seconds=0) >= 2
+    finally:
+        db.close()
+    assert set(get_blob_store().iter_digests()) <= blobs_before
+
+
+def test_bulk_create_without_atomic_skips_invalid_items(client, auth_headers):
+    products_before = _product_ids(client)
+
+    response = client.post(
+        "/products/bulk",
+        json={
+            "items": [
+                {"product_type_id": 1, "name": "Частичный", "price": 10},
+                {"product_type_id": 999999, "name": "Без типа", "price": 20},
+            ]
+        },
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["applied"] == 1
+    created = result["results"][0]["id"]
+    assert _product_ids(client) == sorted(products_before + [created])
@@ -0,0 +1,13 @@
+"""Сжатие ответов."""
+import pytest
+
+
+@pytest.mark.parametrize("accept_encoding", ["gzip", "identity", "compress"])
+def test_compressible_response_varies_on_accept_encoding(client, accept_encoding):
+    response = client.get("/products/", headers={"Accept-Encoding": accept_encoding})
+
+    assert response.status_code == 200
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert response.headers.get("content-encoding") == (
+        "gzip" if accept_encoding == "gzip" else None
+    )
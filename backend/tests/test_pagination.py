@@ -0,0 +1,50 @@
+"""Курсорная пагинация товаров: обход всех страниц по X-Next-Cursor."""
+import pytest
+from app.core.pagination import NEXT_CURSOR_HEADER
+
+PAGE_SIZE = 3
+
+
+@pytest.fixture(scope="module")
+def duplicate_sort_keys(client, auth_headers):
+    # Товары с одинаковыми ценой и названием: порядок внутри них задает id
+    for _ in range(2):
+        response = client.post(
+            "/products/",
+            json={"product_type_id": 1, "name": "Дубликат", "price": 1000},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200, response.text
+
+
+def _walk(client, sort):
+    ids = []
+    params = {"sort": sort, "limit": PAGE_SIZE}
+    while True:
+        response = client.get("/products/", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page) <= PAGE_SIZE
+        ids.extend(product["id"] for product in page)
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids
+        params["after"] = cursor
+
+
+@pytest.mark.parametrize(
+    "sort, key",
+    [
+        ("id", lambda p: p["id"]),
+        ("-price", lambda p: (-p["price"], -p["id"])),
+        ("name", lambda p: (p["name"], p["id"])),
+    ],
+)
+def test_cursor_walk_returns_every_product_once_in_order(
+    client, duplicate_sort_keys, sort, key
+):
+    products = client.get("/products/", params={"limit": 1000}).json()
+    assert len(products) > PAGE_SIZE
+    expected = [product["id"] for product in sorted(products, key=key)]
+
+    assert _walk(client, sort) == expected
@@ -0,0 +1,43 @@
+"""
+Бюджеты SQL-запросов горячих эндпоинтов. Тест падает, если изменение добавило
+запросы (например, N+1 при чтении связей): холодный путь - после сброса кешей,
+теплый - повторный запрос с заполненными кешами.
+"""
+import pytest
+from app.core.cache import clear_caches
+from app.core.testing import assert_max_queries
+from app.crud.review import latest_reviews
+
+
+def _reset_caches():
+    clear_caches()
+    latest_reviews.invalidate()
+
+
+@pytest.mark.parametrize(
+    "url, cold_budget, warm_budget",
+    [
+        # Версия таблицы для ETag и страница товаров; на теплом кеше - только версия
+        ("/products/", 2, 1),
+        ("/products/?limit=5&sort=-price", 2, 1),
+        # Версии таблиц и отзывы вместе с авторами одним запросом
+        ("/reviews/", 2, 2),
+        # Буфер в памяти процесса; холодный путь - один запрос по индексу
+        ("/reviews/latest", 1, 0),
+    ],
+)
+def test_public_endpoint_query_budget(client, url, cold_budget, warm_budget):
+    _reset_caches()
+    with assert_max_queries(cold_budget):
+        assert client.get(url).status_code == 200
+    with assert_max_queries(warm_budget):
+        assert client.get(url).status_code == 200
+
+
+def test_current_user_query_budget(client, auth_headers):
+    _reset_caches()
+    # Пользователь токена читается из БД один раз, затем берется из кеша
+    with assert_max_queries(1):
+        assert client.get("/users/me", headers=auth_headers).status_code == 200
+    with assert_max_queries(0):
+        assert client.get("/users/me", headers=auth_headers).status_code == 200
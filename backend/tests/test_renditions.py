@@ -0,0 +1,28 @@
+"""Построение уменьшенных копий изображений."""
+from app.core import renditions
+from app.core.config import settings
+from app.core.storage import get_blob_store
+
+
+def test_undecodable_image_is_not_rendered_again(monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_RENDITION_WORKERS", 0)
+    calls = []
+    render_image = renditions.render_image
+
+    def counting_render_image(data):
+        calls.append(data)
+        return render_image(data)
+
+    monkeypatch.setattr(renditions, "render_image", counting_render_image)
+    # Сигнатура PNG проходит проверку загрузки, но Pillow файл не прочитает
+    image_hash = get_blob_store().put(b"\x89PNG\r\n\x1a\n" + b"not an image" * 10)
+
+    renditions.schedule_renditions(image_hash)
+    renditions.schedule_renditions(image_hash)
+
+    assert len(calls) == 1
+    assert not renditions.renditions_complete(image_hash)
+
+    # Повторная загрузка того же изображения снова ставит его в очередь
+    renditions.schedule_renditions(image_hash, retry_failed=True)
+    assert len(calls) == 2
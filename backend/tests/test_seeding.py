@@ -0,0 +1,16 @@
+"""Генератор синтетического каталога."""
+import pytest
+from app.core.database import engine
+from app.core.seeding import generate_catalog
+
+
+def test_reseeding_with_same_seed_is_rejected_before_writing(client):
+    counts = generate_catalog(engine, product_types=2, users=2, seed=9001, with_images=False)
+    assert counts == {"product_types": 2, "users": 2, "products": 0, "reviews": 0}
+
+    with pytest.raises(ValueError, match="seed 9001 is already loaded"):
+        generate_catalog(engine, product_types=2, users=2, seed=9001, with_images=False)
+
+    # Другой seed дает другие названия и логины
+    counts = generate_catalog(engine, product_types=2, users=2, seed=9002, with_images=False)
+    assert counts["product_types"] == 2
@@ -0,0 +1,21 @@
+"""Хранилище blob-объектов."""
+import io
+import os
+import time
+from app.core.storage import get_blob_store
+
+
+def test_saving_existing_blob_refreshes_modified_time():
+    store = get_blob_store()
+    data = b"\x89PNG\r\n\x1a\n" + b"shared image"
+    digest = store.put(data)
+    day_ago = time.time() - 86400
+    os.utime(store.path(digest), (day_ago, day_ago))
+
+    # Повторное сохранение того же содержимого защищает файл от collect-images
+    assert store.put(data) == digest
+    assert store.modified_at(digest) > day_ago + 3600
+
+    os.utime(store.path(digest), (day_ago, day_ago))
+    assert store.put_stream(io.BytesIO(data)) == digest
+    assert store.modified_at(digest) > day_ago + 3600
@@ -1,6 +1,12 @@
 import axios from 'axios'
 
-const API_URL = 'http://localhost:8000'
+export const API_URL = 'http://localhost:8000'
+
+// size: thumb | card | full - уменьшенная копия, подготовленная сервером
+export const imageUrl = (path, size) => {
+  if (!path) return null
+  return size ? `${API_URL}${path}&size=${size}` : `${API_URL}${path}`
+}
 
 const api = axios.create({
   baseURL: API_URL,
@@ -17,17 +23,77 @@ api.interceptors.request.use(config => {
   return config
 })
 
+// Истекший access-токен обновляется по refresh-токену без повторного ввода пароля.
+// Параллельные запросы с 401 ждут одного общего обновления
+let refreshing = null
+
+const refreshTokens = () => {
+  if (!refreshing) {
+    const refreshToken = localStorage.getItem('refresh_token')
+    refreshing = (refreshToken
+      ? axios.post(`${API_URL}/auth/refresh`, { refresh_token: refreshToken })
+      : Promise.reject(new Error('No refresh token'))
+    )
+      .then(response => {
+        localStorage.setItem('token', response.data.access_token)
+        localStorage.setItem('refresh_token', response.data.refresh_token)
+        return response.data.access_token
+      })
+      .finally(() => {
+        refreshing = null
+      })
+  }
+  return refreshing
+}
+
+api.interceptors.response.use(null, async error => {
+  const config = error.config
+  if (error.response?.status !== 401 || !config || config._retried || config.url?.startsWith('/auth/')) {
+    throw error
+  }
+  config._retried = true
+  try {
+    const token = await refreshTokens()
+    config.headers.Authorization = `Bearer ${token}`
+  } catch {
+    throw error
+  }
+  return api(config)
+})
+
+const saveTokens = response => {
+  localStorage.setItem('token', response.data.access_token)
+  localStorage.setItem('refresh_token', response.data.refresh_token)
+  return response
+}
+
 export const auth = {
-  register: (login, password) => api.post('/auth/register', { login, password }),
-  login: (login, password) => api.post('/auth/login', { login, password }),
+  register: (login, password) => api.post('/auth/register', { login, password }).then(saveTokens),
+  login: (login, password) => api.post('/auth/login', { login, password }).then(saveTokens),
+  logout: () => {
+    const refreshToken = localStorage.getItem('refresh_token')
+    localStorage.removeItem('token')
+    localStorage.removeItem('refresh_token')
+    localStorage.removeItem('user')
+    if (refreshToken) {
+      api.post('/auth/logout', { refresh_token: refreshToken }).catch(() => {})
+    }
+  },
   getCurrentUser: () => api.get('/users/me')
 }
 
 export const products = {
-  getAll: () => api.get('/products/'),
+  getAll: (params = {}) => api.get('/products/', { params }),
   getById: (id) => api.get(`/products/${id}`),
+  // Несколько товаров одним запросом в порядке ids; отсутствующие id - в заголовке X-Missing-Ids
+  getByIds: (ids) => api.get('/products/', { params: { ids: ids.join(',') } }),
   create: (data) => api.post('/products/', data),
   update: (id, data) => api.put(`/products/${id}`, data),
+  uploadImage: (id, file) => {
+    const data = new FormData()
+    data.append('image', file)
+    return api.put(`/products/${id}/image`, data)
+  },
   delete: (id) => api.delete(`/products/${id}`)
 }
 
@@ -43,11 +109,32 @@ export const reviews = {
   create: (data) => api.post('/reviews/', data)
 }
 
+// В корзине хранится только то, что нужно для отображения; актуальные данные
+// подгружаются при открытии корзины (cart.refresh)
+const cartFields = ({ id, name, description, price, image_url }) => ({
+  id, name, description, price, image_url
+})
+
 export const cart = {
   getItems: () => {
     const items = localStorage.getItem('cart')
     return items ? JSON.parse(items) : []
   },
+  // Обновляет цены и описания товаров корзины одним запросом, удаляет товары,
+  // которых больше нет в каталоге
+  refresh: async () => {
+    const items = cart.getItems()
+    if (items.length === 0) {
+      return items
+    }
+    const response = await products.getByIds(items.map(item => item.id))
+    const byId = new Map(response.data.map(product => [product.id, product]))
+    const refreshed = items
+      .filter(item => byId.has(item.id))
+      .map(item => ({ ...cartFields(byId.get(item.id)), quantity: item.quantity }))
+    localStorage.setItem('cart', JSON.stringify(refreshed))
+    return refreshed
+  },
   addItem: (product, quantity = 1) => {
     const items = cart.getItems()
     const existingItem = items.find(item => item.id === product.id)
@@ -55,7 +142,7 @@ export const cart = {
     if (existingItem) {
       existingItem.quantity += quantity
     } else {
-      items.push({ ...product, quantity })
+      items.push({ ...cartFields(product), quantity })
     }
 
     localStorage.setItem('cart', JSON.stringify(items))